@@ -1,99 +1,591 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import text
-from database import Base, engine, SessionLocal
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database import Base, engine, async_engine, AsyncSessionLocal, Currency, CurrencyType, SEARCH_VECTOR_EXPRESSION
 from config import settings
 from routers import auth, properties, applications, upload
+import asyncio
+import os
 import time
-import psutil
 import logging
+import logging.handlers
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+# Settings are immutable after startup, so resolve env-derived flags once
+IS_PROD = settings.is_production()
+CORS_ORIGINS = settings.get_cors_origins()
 
 # Configure logging for production
-if settings.is_production():
+# Request-path loggers only enqueue records; file/stream I/O happens on the listener thread
+log_listener = None
+if IS_PROD:
+    log_queue = queue.SimpleQueue()
     logging.basicConfig(
         level=getattr(logging, settings.log_level),
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('/app/logs/app.log'),
-            logging.StreamHandler()
-        ]
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+    log_listener = logging.handlers.QueueListener(
+        log_queue,
+        logging.FileHandler('/app/logs/app.log'),
+        logging.StreamHandler()
     )
 else:
     logging.basicConfig(level=logging.DEBUG)
 
 logger = logging.getLogger(__name__)
 
-# Import security middleware for production
-if settings.is_production():
-    try:
-        from security import SecurityMiddleware, limiter, rate_limit_handler
-        from slowapi.errors import RateLimitExceeded
-        SECURITY_ENABLED = True
-    except ImportError:
-        logger.warning("Security middleware not available")
-        SECURITY_ENABLED = False
-else:
-    SECURITY_ENABLED = False
+# Default amenities seeded on startup (read-only, shared across forked workers)
+_DEFAULT_AMENITIES: Tuple[Mapping[str, str], ...] = (
+    MappingProxyType({"name": "WiFi", "description": "High-speed internet access", "icon": "wifi", "category": "utilities"}),
+    MappingProxyType({"name": "Parking", "description": "Dedicated parking space", "icon": "car", "category": "utilities"}),
+    MappingProxyType({"name": "Air Conditioning", "description": "Central air conditioning", "icon": "snowflake", "category": "utilities"}),
+    MappingProxyType({"name": "Heating", "description": "Central heating system", "icon": "fire", "category": "utilities"}),
+    MappingProxyType({"name": "Washer/Dryer", "description": "In-unit laundry facilities", "icon": "tshirt", "category": "appliances"}),
+    MappingProxyType({"name": "Dishwasher", "description": "Built-in dishwasher", "icon": "utensils", "category": "appliances"}),
+    MappingProxyType({"name": "Swimming Pool", "description": "Access to swimming pool", "icon": "swimmer", "category": "recreation"}),
+    MappingProxyType({"name": "Gym/Fitness Center", "description": "On-site fitness facilities", "icon": "dumbbell", "category": "recreation"}),
+    MappingProxyType({"name": "Pet Friendly", "description": "Pets are welcome", "icon": "paw", "category": "policies"}),
+    MappingProxyType({"name": "Balcony/Patio", "description": "Private outdoor space", "icon": "tree", "category": "features"}),
+    MappingProxyType({"name": "Garden", "description": "Access to garden area", "icon": "leaf", "category": "features"}),
+    MappingProxyType({"name": "Security System", "description": "24/7 security monitoring", "icon": "shield", "category": "security"}),
+)
 
 async def seed_initial_data():
     """Seed the database with initial amenities"""
     from database import Amenity
     
-    db = SessionLocal()
+    async with AsyncSessionLocal() as db:
+        try:
+            # Insert all default amenities in one statement, skipping existing names
+            # values() needs plain dicts to recognise a multi-row insert
+            stmt = pg_insert(Amenity.__table__).values([dict(a) for a in _DEFAULT_AMENITIES]).on_conflict_do_nothing(
+                index_elements=["name"]
+            )
+            await db.execute(stmt)
+            await db.commit()
+            print("✅ Initial amenities seeded successfully")
+            
+        except Exception as e:
+            print(f"❌ Error seeding amenities: {e}")
+            await db.rollback()
+
+def create_extensions():
+    """Install the extensions model indexes depend on (gin_trgm_ops comes from pg_trgm)"""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+# Missing indexes are built CONCURRENTLY so live reads and writes carry on during the build.
+# Concurrent builds on one table wait for each other, so tables are built side by side and
+# each table's indexes one after another
+INDEX_BUILD_WORKERS = 4
+INDEX_BUILD_MEMORY = "256MB"
+
+def _create_index(index, rebuild: bool = False) -> bool:
+    """Build one index CONCURRENTLY on its own autocommit connection; True if it was created"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Skip an index rather than queue behind live traffic for its lock; the next startup retries it
+        conn.exec_driver_sql("SET lock_timeout = '2s'")
+        conn.exec_driver_sql(f"SET maintenance_work_mem = '{INDEX_BUILD_MEMORY}'")
+        # Only for this statement: create_all emits the same Index inside a transaction,
+        # where CONCURRENTLY isn't allowed
+        pg_options = index.dialect_options["postgresql"]
+        pg_options["concurrently"] = True
+        try:
+            if rebuild:
+                # An interrupted concurrent build leaves an INVALID index behind that is never used
+                conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"')
+            conn.execute(CreateIndex(index))
+            print(f"✅ Index {index.name} created")
+            return True
+        except DBAPIError as e:
+            # Lock timeout, missing operator class, duplicates under a unique index...: skip this one
+            # index so the remaining startup steps still run; the next startup retries it
+            print(f"❌ Index {index.name} not created: {e.orig}")
+            return False
+        finally:
+            pg_options["concurrently"] = False
+            conn.exec_driver_sql("RESET lock_timeout")
+            conn.exec_driver_sql("RESET maintenance_work_mem")
+
+def _create_table_indexes(indexes, invalid) -> list:
+    """Build one table's missing indexes in turn; returns the names created"""
+    return [index.name for index in indexes if _create_index(index, rebuild=index.name in invalid)]
+
+def create_missing_indexes():
+    """Create model indexes that don't exist (or are invalid) on already-created tables"""
+    with engine.connect() as conn:
+        indisvalid = dict(conn.execute(text(
+            "SELECT c.relname, i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema()"
+        )).all())
+    invalid = {name for name, valid in indisvalid.items() if not valid}
+    missing_by_table = [
+        missing for table in Base.metadata.sorted_tables
+        if (missing := [index for index in table.indexes if not indisvalid.get(index.name)])
+    ]
+    if not missing_by_table:
+        return
+    with ThreadPoolExecutor(max_workers=min(INDEX_BUILD_WORKERS, len(missing_by_table))) as executor:
+        created = [
+            name for names in executor.map(lambda indexes: _create_table_indexes(indexes, invalid), missing_by_table)
+            for name in names
+        ]
+    prewarm_indexes(created)
+
+def prewarm_indexes(names) -> None:
+    """Load freshly built indexes into shared_buffers so the first queries don't read them from disk"""
+    if not names:
+        return
     try:
-        # Create default amenities if they don't exist
-        default_amenities = [
-            {"name": "WiFi", "description": "High-speed internet access", "icon": "wifi", "category": "utilities"},
-            {"name": "Parking", "description": "Dedicated parking space", "icon": "car", "category": "utilities"},
-            {"name": "Air Conditioning", "description": "Central air conditioning", "icon": "snowflake", "category": "utilities"},
-            {"name": "Heating", "description": "Central heating system", "icon": "fire", "category": "utilities"},
-            {"name": "Washer/Dryer", "description": "In-unit laundry facilities", "icon": "tshirt", "category": "appliances"},
-            {"name": "Dishwasher", "description": "Built-in dishwasher", "icon": "utensils", "category": "appliances"},
-            {"name": "Swimming Pool", "description": "Access to swimming pool", "icon": "swimmer", "category": "recreation"},
-            {"name": "Gym/Fitness Center", "description": "On-site fitness facilities", "icon": "dumbbell", "category": "recreation"},
-            {"name": "Pet Friendly", "description": "Pets are welcome", "icon": "paw", "category": "policies"},
-            {"name": "Balcony/Patio", "description": "Private outdoor space", "icon": "tree", "category": "features"},
-            {"name": "Garden", "description": "Access to garden area", "icon": "leaf", "category": "features"},
-            {"name": "Security System", "description": "24/7 security monitoring", "icon": "shield", "category": "security"},
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_prewarm"))
+            for name in names:
+                conn.execute(text("SELECT pg_prewarm(CAST(:name AS regclass), 'buffer')"), {"name": name})
+        print(f"✅ Prewarmed {len(names)} new indexes")
+    except DBAPIError as e:
+        # pg_prewarm is optional (the extension may be missing or need a superuser to create)
+        print(f"❌ Indexes not prewarmed: {e.orig}")
+
+def migrate_currency_type_column():
+    """Convert property_prices.currency_type from the old varchar column to smallint"""
+    with engine.begin() as conn:
+        data_type = conn.execute(text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'property_prices' AND column_name = 'currency_type'"
+        )).scalar()
+        if data_type == "character varying":
+            conn.execute(text(
+                "ALTER TABLE property_prices ALTER COLUMN currency_type "
+                "TYPE smallint USING currency_type::smallint"
+            ))
+            print("✅ property_prices.currency_type converted to smallint")
+
+def migrate_currency_table():
+    """Seed the currencies lookup and reference it from property_prices.currency_type"""
+    with engine.begin() as conn:
+        conn.execute(
+            pg_insert(Currency.__table__)
+            .values([{"id": currency.value, "code": currency.name} for currency in CurrencyType])
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
+        exists = conn.execute(text(
+            "SELECT 1 FROM pg_constraint WHERE conname = 'property_prices_currency_type_fkey'"
+        )).scalar()
+        if not exists:
+            # NOT VALID: enforce for new rows without scanning (or failing on) existing ones
+            conn.execute(text(
+                "ALTER TABLE property_prices ADD CONSTRAINT property_prices_currency_type_fkey "
+                "FOREIGN KEY (currency_type) REFERENCES currencies (id) NOT VALID"
+            ))
+            print("✅ property_prices.currency_type now references currencies")
+
+def migrate_primary_image_url_column():
+    """Add properties.primary_image_url to existing databases and backfill it"""
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'properties' AND column_name = 'primary_image_url'"
+        )).scalar()
+        if not exists:
+            conn.execute(text("ALTER TABLE properties ADD COLUMN primary_image_url VARCHAR(500)"))
+            conn.execute(text(
+                "UPDATE properties p SET primary_image_url = i.image_url FROM ("
+                "SELECT DISTINCT ON (property_id) property_id, image_url FROM property_images "
+                "ORDER BY property_id, is_primary DESC, order_index, id"
+                ") i WHERE i.property_id = p.id"
+            ))
+            print("✅ properties.primary_image_url added and backfilled")
+
+def migrate_image_hosts():
+    """Split property_images.image_url into an image_hosts prefix and a per-row path"""
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'property_images' AND column_name = 'image_url'"
+        )).scalar()
+        if exists:
+            conn.execute(text(
+                "ALTER TABLE property_images "
+                "ADD COLUMN IF NOT EXISTS host_id SMALLINT REFERENCES image_hosts(id), "
+                "ADD COLUMN IF NOT EXISTS path VARCHAR(500)"
+            ))
+            conn.execute(text(
+                "INSERT INTO image_hosts (prefix) "
+                "SELECT DISTINCT substring(image_url from '^https?://[^/]+/') FROM property_images "
+                "WHERE length(substring(image_url from '^https?://[^/]+/')) <= 200 "
+                "ON CONFLICT (prefix) DO NOTHING"
+            ))
+            conn.execute(text(
+                "UPDATE property_images i SET host_id = h.id, path = substring(i.image_url from length(h.prefix) + 1) "
+                "FROM image_hosts h WHERE h.prefix = substring(i.image_url from '^https?://[^/]+/')"
+            ))
+            conn.execute(text("UPDATE property_images SET path = image_url WHERE host_id IS NULL"))
+            conn.execute(text(
+                "ALTER TABLE property_images ALTER COLUMN path SET NOT NULL, DROP COLUMN image_url"
+            ))
+            print("✅ property_images.image_url split into image_hosts prefix + path")
+
+# Parses text that holds valid JSON; anything else is kept as a JSON string instead of failing the migration
+SAFE_JSONB_FUNCTION = """
+CREATE OR REPLACE FUNCTION pg_temp.safe_jsonb(value text) RETURNS jsonb AS $$
+BEGIN
+    RETURN value::jsonb;
+EXCEPTION WHEN invalid_text_representation THEN
+    RETURN to_jsonb(value);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+def migrate_application_json_columns():
+    """Convert rental_applications.references/pets from text to jsonb"""
+    with engine.begin() as conn:
+        conn.execute(text(SAFE_JSONB_FUNCTION))
+        for column in ("references", "pets"):
+            data_type = conn.execute(text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = 'rental_applications' AND column_name = :column"
+            ), {"column": column}).scalar()
+            if data_type == "text":
+                # Stored JSON text becomes the object/array it encodes, like newly written rows
+                conn.execute(text(
+                    f'ALTER TABLE rental_applications ALTER COLUMN "{column}" '
+                    f'TYPE jsonb USING pg_temp.safe_jsonb("{column}")'
+                ))
+                print(f"✅ rental_applications.{column} converted to jsonb")
+            elif data_type == "jsonb":
+                # Rows converted by the earlier to_jsonb migration hold their JSON text as a string scalar
+                repaired = conn.execute(text(
+                    f'UPDATE rental_applications SET "{column}" = pg_temp.safe_jsonb("{column}" #>> \'{{}}\') '
+                    f'WHERE jsonb_typeof("{column}") = \'string\' AND "{column}" #>> \'{{}}\' ~ \'^\\s*[\\[{{]\''
+                )).rowcount
+                if repaired:
+                    print(f"✅ rental_applications.{column}: {repaired} double-encoded values parsed")
+
+# Old double precision columns and the types they now use
+NUMERIC_COLUMN_TYPES = {
+    "properties": {
+        "rent_amount": "numeric(12,2)", "rent_amount_usd": "numeric(12,2)",
+        "security_deposit": "numeric(12,2)", "latitude": "real", "longitude": "real"
+    },
+    "property_prices": {"price_total": "numeric(12,2)", "price_square": "numeric(12,2)"},
+    "rental_applications": {"monthly_income": "numeric(12,2)"},
+}
+
+def migrate_numeric_columns():
+    """Narrow money columns to numeric(12,2) and coordinates to real, one table rewrite each"""
+    with engine.begin() as conn:
+        for table, columns in NUMERIC_COLUMN_TYPES.items():
+            pending = conn.execute(text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name = :table AND data_type = 'double precision'"
+            ), {"table": table}).scalars().all()
+            alters = [
+                f"ALTER COLUMN {column} TYPE {columns[column]}"
+                for column in pending if column in columns
+            ]
+            if alters:
+                conn.execute(text(f"ALTER TABLE {table} {', '.join(alters)}"))
+                print(f"✅ {table}: converted {len(alters)} double precision columns")
+
+def migrate_source_external_id_unique():
+    """Replace the external_id indexes with a UNIQUE (source, external_id) constraint"""
+    with engine.connect() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM pg_constraint WHERE conname = 'uq_prop_source_ext'"
+        )).scalar()
+        if exists:
+            return
+        try:
+            with conn.begin():
+                conn.execute(text(
+                    "ALTER TABLE properties ADD CONSTRAINT uq_prop_source_ext UNIQUE (source, external_id)"
+                ))
+                conn.execute(text("DROP INDEX IF EXISTS ix_properties_external_id"))
+                conn.execute(text("DROP INDEX IF EXISTS idx_prop_source_ext"))
+            print("✅ properties (source, external_id) unique constraint added")
+        except IntegrityError:
+            print("❌ Duplicate (source, external_id) rows exist, unique constraint not added")
+
+def migrate_application_tenant_property_unique():
+    """Enforce one rental application per (tenant, property) with a unique constraint"""
+    with engine.connect() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM pg_constraint WHERE conname = 'uq_app_tenant_property'"
+        )).scalar()
+        if exists:
+            return
+        try:
+            with conn.begin():
+                conn.execute(text(
+                    "ALTER TABLE rental_applications ADD CONSTRAINT uq_app_tenant_property "
+                    "UNIQUE (tenant_id, property_id)"
+                ))
+            print("✅ rental_applications (tenant_id, property_id) unique constraint added")
+        except IntegrityError:
+            print("❌ Duplicate (tenant_id, property_id) applications exist, unique constraint not added")
+
+# Single-column indexes duplicated by a primary key or by the leading column of a composite index,
+# plus the created_at btree replaced by idx_prop_created_brin
+REDUNDANT_INDEXES = (
+    "ix_users_id", "ix_properties_id", "ix_amenities_id", "ix_parameters_id", "ix_property_images_id",
+    "ix_property_parameters_id", "ix_property_prices_id", "ix_rental_applications_id",
+    "ix_properties_city", "ix_properties_property_type", "ix_properties_is_available",
+    "ix_properties_created_at",
+)
+
+def drop_redundant_indexes():
+    """Drop indexes that only add write and cache cost next to the ones that subsume them"""
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {', '.join(REDUNDANT_INDEXES)}"))
+
+# Per-column planner statistics targets for skewed filter columns (default is 100)
+PROPERTY_STATISTICS_TARGETS = {"city": 1000, "district": 1000, "property_type": 500}
+
+def migrate_statistics_targets():
+    """Raise the statistics target of skewed properties columns and re-ANALYZE just those columns"""
+    with engine.begin() as conn:
+        current = dict(conn.execute(text(
+            "SELECT attname, attstattarget FROM pg_attribute "
+            "WHERE attrelid = 'properties'::regclass AND attname = ANY(:columns)"
+        ), {"columns": list(PROPERTY_STATISTICS_TARGETS)}).all())
+        pending = [
+            column for column, target in PROPERTY_STATISTICS_TARGETS.items()
+            if current.get(column) != target
         ]
+        if pending:
+            alters = ", ".join(
+                f"ALTER COLUMN {column} SET STATISTICS {PROPERTY_STATISTICS_TARGETS[column]}" for column in pending
+            )
+            conn.execute(text(f"ALTER TABLE properties {alters}"))
+            conn.execute(text(f"ANALYZE properties ({', '.join(pending)})"))
+            print(f"✅ properties: raised statistics target of {', '.join(pending)}")
+
+def create_extended_statistics():
+    """Multivariate statistics for city/district/type filters, which the planner otherwise treats as independent"""
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM pg_statistic_ext WHERE stxname = 'properties_loctype_stats'"
+        )).scalar()
+        if exists:
+            return
+        conn.execute(text(
+            "CREATE STATISTICS properties_loctype_stats (dependencies, ndistinct, mcv) "
+            "ON city, district, property_type, listing_type FROM properties"
+        ))
+        # Extended statistics stay empty until the next ANALYZE
+        conn.execute(text("ANALYZE properties"))
+        print("✅ properties_loctype_stats created")
+
+# Leave free space on each heap page so UPDATEs can place the new row version on the same page (HOT)
+TABLE_FILLFACTORS = {"properties": 85, "rental_applications": 85}
+
+def migrate_table_fillfactors():
+    """Lower the fillfactor of frequently updated tables; applies to pages written from now on"""
+    with engine.begin() as conn:
+        for table, fillfactor in TABLE_FILLFACTORS.items():
+            options = conn.execute(text(
+                "SELECT reloptions FROM pg_class WHERE oid = CAST(:table AS regclass)"
+            ), {"table": table}).scalar() or []
+            if f"fillfactor={fillfactor}" not in options:
+                conn.execute(text(f"ALTER TABLE {table} SET (fillfactor = {fillfactor})"))
+                print(f"✅ {table} fillfactor set to {fillfactor}")
+
+# Unique keys the scraper upserts child rows on: name -> (table, columns, index it supersedes)
+CHILD_UNIQUE_CONSTRAINTS = {
+    "uq_pp_prop_param": ("property_parameters", ("property_id", "parameter_id"), "idx_pp_prop_param"),
+    "uq_price_prop_currency": ("property_prices", ("property_id", "currency_type"), "ix_property_prices_property_id"),
+}
+
+def migrate_child_unique_constraints():
+    """Collapse duplicate child rows and add the unique keys used for ON CONFLICT upserts"""
+    for name, (table, columns, superseded_index) in CHILD_UNIQUE_CONSTRAINTS.items():
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": name}
+            ).scalar()
+            if exists:
+                continue
+            # Child rows are rewritten on every scrape, so keeping only the newest duplicate is safe
+            match = " AND ".join(f"a.{column} = b.{column}" for column in columns)
+            conn.execute(text(f"DELETE FROM {table} a USING {table} b WHERE {match} AND a.id < b.id"))
+            conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE ({', '.join(columns)})"))
+            conn.execute(text(f"DROP INDEX IF EXISTS {superseded_index}"))
+            print(f"✅ {table} ({', '.join(columns)}) unique constraint added")
+
+# Tables whose property_id rows go away with their property (ON DELETE CASCADE)
+PROPERTY_CASCADE_TABLES = ("property_images", "property_parameters", "property_prices", "property_amenities", "saved_properties")
+
+def migrate_property_cascade_fks():
+    """Recreate child property_id foreign keys with ON DELETE CASCADE"""
+    with engine.begin() as conn:
+        for table in PROPERTY_CASCADE_TABLES:
+            for name in conn.execute(text(
+                "SELECT conname FROM pg_constraint WHERE contype = 'f' AND confdeltype <> 'c' "
+                "AND conrelid = CAST(:table AS regclass) AND confrelid = 'properties'::regclass"
+            ), {"table": table}).scalars():
+                conn.execute(text(
+                    f"ALTER TABLE {table} DROP CONSTRAINT {name}, ADD CONSTRAINT {name} "
+                    "FOREIGN KEY (property_id) REFERENCES properties(id) ON DELETE CASCADE"
+                ))
+                print(f"✅ {table}.{name} now cascades on property delete")
+
+# Tables whose updated_at column is maintained by the database
+UPDATED_AT_TABLES = ("users", "properties", "rental_applications")
+
+def create_updated_at_triggers():
+    """Set updated_at in a BEFORE UPDATE trigger instead of sending it with every UPDATE"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE OR REPLACE FUNCTION set_updated_at_trigger() RETURNS trigger AS $$ "
+            "BEGIN NEW.updated_at := now(); RETURN NEW; END; "
+            "$$ LANGUAGE plpgsql"
+        ))
+        for table in UPDATED_AT_TABLES:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS set_updated_at ON {table}"))
+            conn.execute(text(
+                f"CREATE TRIGGER set_updated_at BEFORE UPDATE ON {table} "
+                "FOR EACH ROW EXECUTE FUNCTION set_updated_at_trigger()"
+            ))
+
+def migrate_search_vector_column():
+    """Turn properties.search_vector into a stored generated column, replacing the old trigger"""
+    with engine.begin() as conn:
+        generated = conn.execute(text(
+            "SELECT is_generated FROM information_schema.columns "
+            "WHERE table_name = 'properties' AND column_name = 'search_vector'"
+        )).scalar()
+        if generated == "ALWAYS":
+            return
         
-        for amenity_data in default_amenities:
-            existing = db.query(Amenity).filter(Amenity.name == amenity_data["name"]).first()
-            if not existing:
-                amenity = Amenity(**amenity_data)
-                db.add(amenity)
-        
-        db.commit()
-        print("✅ Initial amenities seeded successfully")
-        
+        conn.execute(text("DROP TRIGGER IF EXISTS properties_search_vector_update ON properties"))
+        # Dropping the column drops idx_prop_search too; create_missing_indexes() rebuilds it
+        conn.execute(text("ALTER TABLE properties DROP COLUMN IF EXISTS search_vector"))
+        conn.execute(text(
+            "ALTER TABLE properties ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+        ))
+        print("✅ properties.search_vector is now a generated column")
+
+def cluster_properties():
+    """Rewrite properties in created_at order so newest-first pages and the BRIN index read adjacent heap pages"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # CLUSTER needs a full btree (not BRIN, not partial), so build one just for the rewrite
+        conn.execute(text("CREATE INDEX IF NOT EXISTS tmp_prop_cluster_created ON properties (created_at)"))
+        try:
+            conn.execute(text("CLUSTER properties USING tmp_prop_cluster_created"))
+        finally:
+            conn.execute(text("DROP INDEX IF EXISTS tmp_prop_cluster_created"))
+        # CLUSTER leaves planner statistics stale
+        conn.execute(text("ANALYZE properties"))
+        print("✅ properties clustered by created_at")
+
+# PostgreSQL advisory lock key guarding one-time startup work across workers
+STARTUP_LOCK_ID = 7742331
+
+async def warm_connection_pool():
+    """Eagerly open pool_size connections on both engines and return them to their pools"""
+    try:
+        # Hold all connections at once so each pool really opens pool_size of them
+        connections = await asyncio.gather(*[
+            asyncio.to_thread(engine.connect) for _ in range(settings.db_pool_size)
+        ])
+        for conn in connections:
+            conn.close()
+        async_connections = await asyncio.gather(*[
+            async_engine.connect().start() for _ in range(settings.db_async_pool_size)
+        ])
+        await asyncio.gather(*(conn.close() for conn in async_connections))
+        print(
+            f"✅ Connection pools warmed with {settings.db_pool_size} sync "
+            f"and {settings.db_async_pool_size} async connections"
+        )
     except Exception as e:
-        print(f"❌ Error seeding amenities: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        print(f"❌ Error warming connection pool: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
     # Startup
+    # Listener thread is started per worker (threads don't survive a --preload fork)
+    if log_listener:
+        log_listener.start()
+    
     try:
-        # Create database tables
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created successfully")
+        # Only the worker holding the advisory lock runs DDL and seeding
+        with engine.connect() as lock_conn:
+            is_leader = lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": STARTUP_LOCK_ID}
+            ).scalar()
+            if is_leader:
+                try:
+                    create_extensions()
+                    
+                    # Create database tables
+                    Base.metadata.create_all(bind=engine)
+                    print("✅ Database tables created successfully")
+                    
+                    migrate_currency_type_column()
+                    migrate_currency_table()
+                    migrate_primary_image_url_column()
+                    migrate_image_hosts()
+                    migrate_search_vector_column()
+                    migrate_application_json_columns()
+                    migrate_numeric_columns()
+                    migrate_source_external_id_unique()
+                    migrate_child_unique_constraints()
+                    migrate_property_cascade_fks()
+                    migrate_application_tenant_property_unique()
+                    create_updated_at_triggers()
+                    
+                    # create_all skips existing tables, so add any indexes they are missing
+                    create_missing_indexes()
+                    drop_redundant_indexes()
+                    migrate_statistics_targets()
+                    create_extended_statistics()
+                    migrate_table_fillfactors()
+                    
+                    if settings.db_cluster_on_startup:
+                        cluster_properties()
+                    
+                    # Seed initial data
+                    await seed_initial_data()
+                finally:
+                    lock_conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": STARTUP_LOCK_ID})
+            else:
+                print("⏭️ Another worker is initializing the database, skipping table creation and seeding")
         
-        # Seed initial data
-        await seed_initial_data()
+        # Pre-warm the connection pool so the first requests skip the connect handshake
+        await warm_connection_pool()
         
     except Exception as e:
         print(f"❌ Error during startup: {e}")
     
+    # System metrics are sampled in the background; /health and /metrics only read them
+    sampler_task = None
+    if settings.monitoring_enabled or not IS_PROD:
+        sampler_task = asyncio.create_task(sample_system_metrics())
+    
     yield
     
     # Shutdown (if needed)
     print("🔄 Application shutting down...")
+    if sampler_task:
+        sampler_task.cancel()
+    await async_engine.dispose()
+    if log_listener:
+        log_listener.stop()
 
 # Create FastAPI app with production settings
 app = FastAPI(
@@ -101,11 +593,24 @@ app = FastAPI(
     version=settings.version,
     description="A comprehensive house rental management API - Production Ready",
     lifespan=lifespan,
-    docs_url="/docs" if not settings.is_production() else None,  # Disable docs in production
-    redoc_url="/redoc" if not settings.is_production() else None,
-    openapi_url="/openapi.json" if not settings.is_production() else None
+    default_response_class=ORJSONResponse,
+    docs_url="/docs" if not IS_PROD else None,  # Disable docs in production
+    redoc_url="/redoc" if not IS_PROD else None,
+    openapi_url="/openapi.json" if not IS_PROD else None
 )
 
+# Import security middleware for production (deferred until registration)
+if IS_PROD:
+    try:
+        from security import SecurityMiddleware, limiter, rate_limit_handler
+        from slowapi.errors import RateLimitExceeded
+        SECURITY_ENABLED = True
+    except ImportError:
+        logger.warning("Security middleware not available")
+        SECURITY_ENABLED = False
+else:
+    SECURITY_ENABLED = False
+
 # Add security middleware for production
 if SECURITY_ENABLED:
     app.add_middleware(SecurityMiddleware)
@@ -115,11 +620,11 @@ if SECURITY_ENABLED:
 # Add CORS middleware with restricted origins for production
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.get_cors_origins(),
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"] if settings.is_production() else ["*"],
-    allow_headers=["Authorization", "Content-Type", "X-Requested-With"] if settings.is_production() else ["*"],
-    expose_headers=["X-Total-Count"] if settings.is_production() else []
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"] if IS_PROD else ["*"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With"] if IS_PROD else ["*"],
+    expose_headers=["X-Total-Count"] if IS_PROD else []
 )
 
 # Include routers
@@ -128,6 +633,41 @@ app.include_router(properties.router, prefix="/api")
 app.include_router(applications.router, prefix="/api")
 app.include_router(upload.router, prefix="/api")
 
+def get_psutil():
+    """Import psutil on first use and keep it on app.state"""
+    if not hasattr(app.state, "psutil"):
+        import psutil
+        app.state.psutil = psutil
+    return app.state.psutil
+
+SYSTEM_SAMPLE_INTERVAL = 5
+
+async def sample_system_metrics():
+    """Refresh cpu/memory/disk percentages on app.state every SYSTEM_SAMPLE_INTERVAL seconds"""
+    try:
+        psutil = get_psutil()
+    except ImportError:
+        logger.warning("psutil not installed, system metrics disabled")
+        return
+    # Prime cpu_percent so the first non-blocking reading is meaningful
+    psutil.cpu_percent(interval=None)
+    while True:
+        await asyncio.sleep(SYSTEM_SAMPLE_INTERVAL)
+        try:
+            app.state.cpu_pct = psutil.cpu_percent(interval=None)
+            app.state.mem_pct = psutil.virtual_memory().percent
+            app.state.disk_pct = psutil.disk_usage('/').percent
+        except Exception as e:
+            logger.warning("System metrics sampling failed: %s", e)
+
+def get_system_metrics():
+    """Latest sampled system metrics (None until the first sample)"""
+    return {
+        "cpu_percent": getattr(app.state, "cpu_pct", None),
+        "memory_percent": getattr(app.state, "mem_pct", None),
+        "disk_percent": getattr(app.state, "disk_pct", None)
+    }
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -137,6 +677,19 @@ async def root():
         "docs": "/docs"
     }
 
+# Monotonic timestamp of the last successful database probe
+_LAST_DB_OK_TS = 0.0
+DB_PROBE_CACHE_SECONDS = 1.0
+
+async def check_database():
+    """Run SELECT 1 without blocking the event loop, skipping the query if one succeeded recently"""
+    global _LAST_DB_OK_TS
+    if time.monotonic() - _LAST_DB_OK_TS < DB_PROBE_CACHE_SECONDS:
+        return
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+    _LAST_DB_OK_TS = time.monotonic()
+
 # Enhanced health check endpoint for production
 @app.get("/health")
 async def health_check():
@@ -151,9 +704,7 @@ async def health_check():
         
         # Check database connection
         try:
-            db = SessionLocal()
-            db.execute(text("SELECT 1"))
-            db.close()
+            await check_database()
             health_status["database"] = "connected"
         except Exception as e:
             health_status["database"] = "disconnected"
@@ -173,22 +724,15 @@ async def health_check():
         
         # Check system resources (only in production monitoring)
         if settings.monitoring_enabled:
-            try:
-                health_status["system"] = {
-                    "cpu_percent": psutil.cpu_percent(interval=1),
-                    "memory_percent": psutil.virtual_memory().percent,
-                    "disk_percent": psutil.disk_usage('/').percent
-                }
-            except Exception:
-                pass  # System metrics not critical
+            health_status["system"] = get_system_metrics()
         
         # Return appropriate status code
         status_code = 200 if health_status["status"] == "healthy" else 503
-        return JSONResponse(content=health_status, status_code=status_code)
+        return ORJSONResponse(content=health_status, status_code=status_code)
         
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        logger.error("Health check failed: %s", e)
+        return ORJSONResponse(
             content={
                 "status": "unhealthy",
                 "timestamp": datetime.utcnow().isoformat(),
@@ -203,12 +747,10 @@ async def readiness_check():
     """Readiness check for container orchestration"""
     try:
         # Check if app is ready to serve requests
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        await check_database()
         return {"status": "ready", "timestamp": datetime.utcnow().isoformat()}
     except Exception:
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "not ready", "timestamp": datetime.utcnow().isoformat()},
             status_code=503
         )
@@ -217,7 +759,7 @@ async def readiness_check():
 @app.get("/metrics")
 async def metrics():
     """Basic metrics endpoint"""
-    if settings.is_production():
+    if IS_PROD:
         # In production, this should be protected or use proper monitoring tools
         return {"message": "Metrics available through monitoring tools"}
     
@@ -226,11 +768,7 @@ async def metrics():
             "timestamp": datetime.utcnow().isoformat(),
             "uptime": time.time() - app.state.start_time if hasattr(app.state, 'start_time') else 0,
             "requests_count": getattr(app.state, 'requests_count', 0),
-            "system": {
-                "cpu_percent": psutil.cpu_percent(),
-                "memory_percent": psutil.virtual_memory().percent,
-                "disk_percent": psutil.disk_usage('/').percent
-            }
+            "system": get_system_metrics()
         }
     except Exception:
         return {"error": "Metrics not available"}
@@ -241,5 +779,9 @@ if __name__ == "__main__":
         "app:app",
         host="0.0.0.0",
         port=8000,
-        reload=settings.debug
+        reload=settings.debug,
+        # libuv event loop and C HTTP parser outside of reload/debug runs
+        loop="asyncio" if settings.debug else "uvloop",
+        http="httptools",
+        workers=1 if settings.debug else int(os.getenv("WEB_CONCURRENCY", "4"))
     )
\ No newline at end of file
@@ -1,26 +1,86 @@
 """
 Redis caching utilities for improved performance
 """
-import json
+import asyncio
+import msgpack
 import redis
+import redis.asyncio
+import hashlib
+from datetime import date
+from enum import Enum
 from typing import Optional, Any, List
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from config import settings
+from database import SessionLocal, AsyncSessionLocal
 import logging
-from functools import wraps
-import hashlib
+import threading
+import time
+from functools import wraps, lru_cache
 
 logger = logging.getLogger(__name__)
 
+try:
+    import xxhash
+    
+    def _hash_params(data: bytes) -> str:
+        return xxhash.xxh3_64_hexdigest(data)
+except ImportError:
+    # BLAKE2b is faster than MD5 and still available on FIPS-mode builds
+    def _hash_params(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Keys fetched per SCAN call and deleted per DEL command
+SCAN_BATCH_SIZE = 500
+
+# Stale-while-revalidate: how long past TTL a stale value may be served,
+# and how long a refresh lock is held
+STALE_GRACE_SECONDS = 60
+REFRESH_LOCK_TTL = 30
+
 # Initialize Redis client
 try:
-    redis_client = redis.from_url(settings.redis_url_with_auth, decode_responses=True)
+    redis_client = redis.from_url(settings.redis_url_with_auth, decode_responses=False)
+    # Used by coroutine endpoints so cache round trips don't block the event loop
+    async_redis_client = redis.asyncio.from_url(settings.redis_url_with_auth, decode_responses=False)
     CACHE_ENABLED = True
     logger.info("✅ Redis cache enabled")
 except Exception as e:
-    logger.warning(f"❌ Redis not available, cache disabled: {e}")
+    logger.warning("❌ Redis not available, cache disabled: %s", e)
     redis_client = None
+    async_redis_client = None
     CACHE_ENABLED = False
 
+# Server-side SCAN + DEL over every pattern passed in ARGV, returns number of keys deleted
+INVALIDATE_LUA = """
+local n = 0
+for _, pattern in ipairs(ARGV) do
+    local cursor = "0"
+    repeat
+        local res = redis.call('SCAN', cursor, 'MATCH', pattern, 'COUNT', 500)
+        cursor = res[1]
+        for _, key in ipairs(res[2]) do
+            redis.call('DEL', key)
+            n = n + 1
+        end
+    until cursor == "0"
+end
+return n
+"""
+INVALIDATE_SCRIPT = redis_client.register_script(INVALIDATE_LUA) if CACHE_ENABLED else None
+
+
+def _build_cache_key(prefix: str, sorted_params) -> str:
+    """Hash sorted (name, value) pairs into a compact cache key"""
+    params_str = "|".join(f"{k}={v}" for k, v in sorted_params)
+    return f"{prefix}:{_hash_params(params_str.encode())}"
+
+
+@lru_cache(maxsize=4096)
+def _build_cache_key_cached(prefix: str, sorted_params: tuple) -> str:
+    """Memoized variant for hashable parameter sets (repeat query shapes)"""
+    return _build_cache_key(prefix, sorted_params)
+
 
 class CacheManager:
     """Redis cache manager for property queries"""
@@ -29,10 +89,12 @@ class CacheManager:
     def generate_cache_key(prefix: str, **kwargs) -> str:
         """Generate a cache key from parameters"""
         # Sort kwargs for consistent key generation
-        sorted_params = sorted(kwargs.items())
-        params_str = json.dumps(sorted_params, sort_keys=True)
-        hash_key = hashlib.md5(params_str.encode()).hexdigest()
-        return f"{prefix}:{hash_key}"
+        sorted_params = tuple(sorted(kwargs.items()))
+        try:
+            return _build_cache_key_cached(prefix, sorted_params)
+        except TypeError:
+            # Unhashable values (lists, dicts) can't be memoized
+            return _build_cache_key(prefix, sorted_params)
     
     @staticmethod
     def get(key: str) -> Optional[Any]:
@@ -43,9 +105,9 @@ class CacheManager:
         try:
             value = redis_client.get(key)
             if value:
-                return json.loads(value)
+                return msgpack.unpackb(value, timestamp=3, raw=False)
         except Exception as e:
-            logger.error(f"Cache get error: {e}")
+            logger.error("Cache get error: %s", e)
         
         return None
     
@@ -56,10 +118,30 @@ class CacheManager:
             return False
         
         try:
-            redis_client.setex(key, ttl, json.dumps(value, default=str))
+            redis_client.setex(key, ttl, msgpack.packb(value, default=str, datetime=True, use_bin_type=True))
             return True
         except Exception as e:
-            logger.error(f"Cache set error: {e}")
+            logger.error("Cache set error: %s", e)
+            return False
+    
+    @staticmethod
+    async def async_get(key: str) -> Optional[Any]:
+        """Get value from cache without blocking the event loop"""
+        if not CACHE_ENABLED:
+            return None
+        return await _async_get(key)
+    
+    @staticmethod
+    async def async_set(key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value in cache with TTL without blocking the event loop"""
+        if not CACHE_ENABLED:
+            return False
+        
+        try:
+            await async_redis_client.setex(key, ttl, msgpack.packb(value, default=str, datetime=True, use_bin_type=True))
+            return True
+        except Exception as e:
+            logger.error("Cache set error: %s", e)
             return False
     
     @staticmethod
@@ -72,9 +154,25 @@ class CacheManager:
             redis_client.delete(key)
             return True
         except Exception as e:
-            logger.error(f"Cache delete error: {e}")
+            logger.error("Cache delete error: %s", e)
             return False
     
+    @staticmethod
+    def _queue_pattern_delete(pipe, pattern: str) -> int:
+        """Queue DEL commands for keys matching pattern, returns number of keys queued"""
+        batch = []
+        queued = 0
+        for key in redis_client.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= SCAN_BATCH_SIZE:
+                pipe.delete(*batch)
+                queued += len(batch)
+                batch = []
+        if batch:
+            pipe.delete(*batch)
+            queued += len(batch)
+        return queued
+    
     @staticmethod
     def clear_pattern(pattern: str) -> int:
         """Clear cache keys matching pattern"""
@@ -82,18 +180,145 @@ class CacheManager:
             return 0
         
         try:
-            keys = redis_client.keys(pattern)
-            if keys:
-                return redis_client.delete(*keys)
+            pipe = redis_client.pipeline(transaction=False)
+            if CacheManager._queue_pattern_delete(pipe, pattern):
+                return sum(pipe.execute())
         except Exception as e:
-            logger.error(f"Cache clear pattern error: {e}")
+            logger.error("Cache clear pattern error: %s", e)
         
         return 0
 
 
-def cache_property_search(ttl: int = 300):
-    """Decorator for caching property search results"""
+def _acquire_refresh_lock(cache_key: str) -> bool:
+    """Single-flight guard so only one caller refreshes a stale entry"""
+    try:
+        return bool(redis_client.set(f"{cache_key}:lock", b"1", nx=True, ex=REFRESH_LOCK_TTL))
+    except Exception as e:
+        logger.error("Cache lock error: %s", e)
+        return False
+
+
+def _store_fresh(cache_key: str, value: Any, ttl: int, grace: int) -> None:
+    """Store value with its soft expiry; Redis keeps it for the grace period beyond that"""
+    CacheManager.set(cache_key, {"v": value, "exp": time.time() + ttl}, ttl + grace)
+
+
+async def _async_get(key: str) -> Optional[Any]:
+    """Non-blocking counterpart of CacheManager.get"""
+    try:
+        value = await async_redis_client.get(key)
+        if value:
+            return msgpack.unpackb(value, timestamp=3, raw=False)
+    except Exception as e:
+        logger.error("Cache get error: %s", e)
+    return None
+
+
+async def _async_acquire_refresh_lock(cache_key: str) -> bool:
+    """Non-blocking counterpart of _acquire_refresh_lock"""
+    try:
+        return bool(await async_redis_client.set(f"{cache_key}:lock", b"1", nx=True, ex=REFRESH_LOCK_TTL))
+    except Exception as e:
+        logger.error("Cache lock error: %s", e)
+        return False
+
+
+async def _async_store_fresh(cache_key: str, value: Any, ttl: int, grace: int) -> None:
+    """Non-blocking counterpart of _store_fresh"""
+    try:
+        packed = msgpack.packb({"v": value, "exp": time.time() + ttl}, default=str, datetime=True, use_bin_type=True)
+        await async_redis_client.setex(cache_key, ttl + grace, packed)
+    except Exception as e:
+        logger.error("Cache set error: %s", e)
+
+
+# Strong references to in-flight background refreshes so they aren't garbage collected
+_refresh_tasks = set()
+
+_PLAIN_TYPES = (str, int, float, bool, date, Enum, type(None))
+
+
+def _key_params(kwargs: dict) -> dict:
+    """Only plain filter values go into the key: a db session, request or user object would make
+    every key unique (and keep the object alive in the key memo)"""
+    return {
+        name: value for name, value in kwargs.items()
+        if isinstance(value, _PLAIN_TYPES)
+        or (isinstance(value, (list, tuple)) and all(isinstance(item, _PLAIN_TYPES) for item in value))
+    }
+
+
+def _with_session(args: tuple, kwargs: dict, session_type: type, session) -> tuple:
+    """args/kwargs with every session of session_type replaced by session"""
+    return (
+        tuple(session if isinstance(arg, session_type) else arg for arg in args),
+        {name: session if isinstance(value, session_type) else value for name, value in kwargs.items()},
+    )
+
+
+def cache_property_search(ttl: int = 300, grace: int = STALE_GRACE_SECONDS):
+    """Decorator for caching property search results with stale-while-revalidate"""
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            async def refresh_async(cache_key, args, kwargs):
+                try:
+                    # The request's session is closed by the time this runs: use a fresh one
+                    async with AsyncSessionLocal() as db:
+                        fresh_args, fresh_kwargs = _with_session(args, kwargs, AsyncSession, db)
+                        result = await func(*fresh_args, **fresh_kwargs)
+                    await _async_store_fresh(cache_key, result, ttl, grace)
+                except Exception as e:
+                    logger.error("Cache refresh error for %s: %s", cache_key, e)
+                finally:
+                    try:
+                        await async_redis_client.delete(f"{cache_key}:lock")
+                    except Exception as e:
+                        logger.error("Cache delete error: %s", e)
+            
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not CACHE_ENABLED:
+                    return await func(*args, **kwargs)
+                
+                cache_key = CacheManager.generate_cache_key(
+                    f"property_search:{func.__name__}",
+                    **_key_params(kwargs)
+                )
+                
+                cached = await _async_get(cache_key)
+                if isinstance(cached, dict) and "exp" in cached:
+                    if cached["exp"] > time.time():
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Cache hit for key: %s", cache_key)
+                        return cached["v"]
+                    
+                    # Past the soft TTL: serve stale and refresh in the background
+                    if await _async_acquire_refresh_lock(cache_key):
+                        task = asyncio.create_task(refresh_async(cache_key, args, kwargs))
+                        _refresh_tasks.add(task)
+                        task.add_done_callback(_refresh_tasks.discard)
+                    return cached["v"]
+                
+                result = await func(*args, **kwargs)
+                await _async_store_fresh(cache_key, result, ttl, grace)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Cached result for key: %s", cache_key)
+                
+                return result
+            return async_wrapper
+        
+        def refresh(cache_key, args, kwargs):
+            try:
+                # The request's session is closed by the time this runs: use a fresh one
+                with SessionLocal() as db:
+                    fresh_args, fresh_kwargs = _with_session(args, kwargs, Session, db)
+                    result = func(*fresh_args, **fresh_kwargs)
+                _store_fresh(cache_key, result, ttl, grace)
+            except Exception as e:
+                logger.error("Cache refresh error for %s: %s", cache_key, e)
+            finally:
+                CacheManager.delete(f"{cache_key}:lock")
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             if not CACHE_ENABLED:
@@ -102,19 +327,27 @@ def cache_property_search(ttl: int = 300):
             # Generate cache key from function parameters
             cache_key = CacheManager.generate_cache_key(
                 f"property_search:{func.__name__}",
-                **kwargs
+                **_key_params(kwargs)
             )
             
             # Try to get from cache
-            cached_result = CacheManager.get(cache_key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit for key: {cache_key}")
-                return cached_result
+            cached = CacheManager.get(cache_key)
+            if isinstance(cached, dict) and "exp" in cached:
+                if cached["exp"] > time.time():
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Cache hit for key: %s", cache_key)
+                    return cached["v"]
+                
+                # Past the soft TTL: serve stale and refresh in the background
+                if _acquire_refresh_lock(cache_key):
+                    threading.Thread(target=refresh, args=(cache_key, args, kwargs), daemon=True).start()
+                return cached["v"]
             
             # Execute function and cache result
             result = func(*args, **kwargs)
-            CacheManager.set(cache_key, result, ttl)
-            logger.debug(f"Cached result for key: {cache_key}")
+            _store_fresh(cache_key, result, ttl, grace)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Cached result for key: %s", cache_key)
             
             return result
         return wrapper
@@ -135,10 +368,13 @@ def invalidate_property_cache(property_id: Optional[int] = None):
     if property_id:
         patterns_to_clear.append(f"property:{property_id}:*")
     
-    for pattern in patterns_to_clear:
-        count = CacheManager.clear_pattern(pattern)
+    try:
+        # One round trip: the script SCANs and DELs every pattern server-side
+        count = INVALIDATE_SCRIPT(keys=[], args=patterns_to_clear)
         if count > 0:
-            logger.info(f"Cleared {count} cache entries for pattern: {pattern}")
+            logger.info("Cleared %s cache entries for patterns: %s", count, patterns_to_clear)
+    except Exception as e:
+        logger.error("Cache invalidation error: %s", e)
 
 
 # Cache configuration
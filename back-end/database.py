@@ -1,47 +1,110 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Table
-from sqlalchemy.orm import sessionmaker, relationship, DeclarativeBase, Mapped, mapped_column
+from sqlalchemy import create_engine, make_url, Column, Integer, SmallInteger, String, Text, Float, Numeric, Boolean, DateTime, ForeignKey, Table, Index, UniqueConstraint, FetchedValue, Computed, event, text, select
+from sqlalchemy.orm import Session, sessionmaker, relationship, DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, insert as pg_insert
 from sqlalchemy.sql import func
 from datetime import datetime
-from typing import List, Optional
+import enum
+import re
+from typing import Any, Dict, List, Optional, Tuple
 from config import settings
 
+# Batch executemany() INSERT/UPDATEs into multi-row statements (scraper bulk writes)
+# and turn off JIT, whose compile time outweighs the gain on short OLTP queries
+_driver_options = {}
+if make_url(settings.database_url).get_driver_name() == "psycopg2":
+    _driver_options = {
+        "executemany_mode": "values_plus_batch",
+        "insertmanyvalues_page_size": 1000,
+        "executemany_batch_page_size": 500,
+        "connect_args": {"options": "-c jit=off"},
+    }
+
 # Create engine and session with connection pooling optimizations
 engine = create_engine(
     settings.database_url,
-    pool_size=15,              # Increased pool size
-    max_overflow=30,           # Increased overflow connections
+    **_driver_options,
+    pool_size=settings.db_pool_size,         # Persistent connections kept open per worker
+    max_overflow=settings.db_max_overflow,   # Extra connections allowed under burst load
+    pool_use_lifo=True,        # Reuse the most recently returned (warm) connection first
     pool_pre_ping=True,        # Verify connections before use
-    pool_recycle=1800,         # Recycle connections every 30 minutes (reduced from 1 hour)
-    pool_timeout=60,           # Increased timeout for getting connection from pool
+    pool_recycle=settings.db_pool_recycle,   # Recycle connections (default every 30 minutes)
+    pool_timeout=settings.db_pool_timeout,   # Seconds to wait for a free pooled connection
     pool_reset_on_return='commit',  # Reset connections on return to pool
+    query_cache_size=settings.db_query_cache_size,  # Compiled SQL cache; room for every search filter combination
     echo=False                 # Set to True for SQL debugging
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: objects stay loaded after commit, so serializing them doesn't re-SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async engine for async def endpoints that must not block the event loop
+async_engine = create_async_engine(
+    settings.database_url.replace("postgresql+psycopg2://", "postgresql+asyncpg://").replace("postgresql://", "postgresql+asyncpg://"),
+    pool_size=settings.db_async_pool_size,
+    max_overflow=settings.db_async_max_overflow,
+    pool_use_lifo=True,
+    pool_pre_ping=True,
+    pool_recycle=settings.db_pool_recycle,
+    pool_timeout=settings.db_pool_timeout,
+    connect_args={"server_settings": {"jit": "off"}},
+    query_cache_size=settings.db_query_cache_size,
+    echo=False
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 class Base(DeclarativeBase):
     pass
 
+# Exact 2-decimal money (read back as float) and 4-byte real coordinates (~1m precision)
+Money = Numeric(12, 2, asdecimal=False)
+Coordinate = Float(precision=24)
+
+# Columns indexed for full-text property search, in every language
+SEARCH_VECTOR_COLUMNS = (
+    "title", "title_en", "title_ru", "description", "description_en", "description_ru",
+    "address", "city", "state"
+)
+SEARCH_VECTOR_EXPRESSION = "to_tsvector('simple'::regconfig, {})".format(
+    " || ' ' || ".join(f"coalesce({column}, '')" for column in SEARCH_VECTOR_COLUMNS)
+)
+
+class CurrencyType(enum.IntEnum):
+    """Currency ids as sent by the listings API (stored in property_prices.currency_type)"""
+    USD = 1
+    GEL = 2
+    EUR = 3
+
+class Currency(Base):
+    __tablename__ = "currencies"
+    
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True, autoincrement=False)  # CurrencyType value
+    code: Mapped[str] = mapped_column(String(3), unique=True)
+    rate_to_usd: Mapped[Optional[float]] = mapped_column(Numeric(12, 6, asdecimal=False), nullable=True)  # Exchange rate, refreshed in one row per currency
+
 # Association table for saved properties (many-to-many)
 saved_properties = Table(
     'saved_properties',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('property_id', Integer, ForeignKey('properties.id'), primary_key=True),
-    Column('saved_at', DateTime(timezone=True), server_default=func.now())
+    Column('property_id', Integer, ForeignKey('properties.id', ondelete='CASCADE'), primary_key=True),
+    Column('saved_at', DateTime(timezone=True), server_default=func.now()),
+    # "My saved properties, newest first" without a sort
+    Index('idx_saved_user_saved_at', 'user_id', 'saved_at')
 )
 
 # Association table for property amenities (many-to-many)
 property_amenities = Table(
     'property_amenities',
     Base.metadata,
-    Column('property_id', Integer, ForeignKey('properties.id'), primary_key=True),
+    Column('property_id', Integer, ForeignKey('properties.id', ondelete='CASCADE'), primary_key=True),
     Column('amenity_id', Integer, ForeignKey('amenities.id'), primary_key=True)
 )
 
 class User(Base):
     __tablename__ = "users"
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     password_hash: Mapped[str] = mapped_column(String(255))
     first_name: Mapped[str] = mapped_column(String(100))
@@ -51,7 +114,7 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by the set_updated_at trigger
     
     # Relationships
     properties: Mapped[List["Property"]] = relationship("Property", back_populates="owner")
@@ -64,8 +127,31 @@ class User(Base):
 
 class Property(Base):
     __tablename__ = "properties"
+    __table_args__ = (
+        # Composite indexes for the common search filter combinations
+        Index('idx_prop_city_listing_avail', 'city', 'listing_type', 'is_available'),
+        Index('idx_prop_type_bed_rent', 'property_type', 'bedrooms', 'rent_amount'),
+        Index('idx_prop_geo', 'latitude', 'longitude'),
+        # Partial index over the available rows only: small, stays in RAM, matches nearly every list query
+        Index('idx_prop_available_city_rent', 'city', 'rent_amount', postgresql_where=text('is_available = true')),
+        # Newest-first listing pages walk this; the INCLUDE columns let /count run as an index-only scan
+        Index('idx_prop_available_created', 'created_at',
+              postgresql_include=['city', 'property_type', 'listing_type', 'rent_amount', 'rent_amount_usd', 'bedrooms'],
+              postgresql_where=text('is_available = true')),
+        # Scraped listings are identified by (source, external_id); enables ON CONFLICT upserts
+        UniqueConstraint('source', 'external_id', name='uq_prop_source_ext'),
+        # Scraper cleanup: stale listings of a source by last_scraped
+        Index('idx_prop_source_last_scraped', 'source', 'last_scraped'),
+        Index('idx_prop_search', 'search_vector', postgresql_using='gin'),
+        # city/state are matched with ILIKE '%...%'; a btree can't serve a leading wildcard, trigrams can
+        Index('idx_prop_city_trgm', 'city', postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'}),
+        Index('idx_prop_state_trgm', 'state', postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'}),
+        # created_at follows insert order, so a BRIN summary of page ranges serves date-range filters
+        # at a fraction of a btree's size; newest-first pages use idx_prop_available_created
+        Index('idx_prop_created_brin', 'created_at', postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(255))  # Georgian title (default)
     title_en: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # English title
     title_ru: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # Russian title
@@ -73,22 +159,22 @@ class Property(Base):
     description_en: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # English description
     description_ru: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Russian description
     address: Mapped[str] = mapped_column(String(500))
-    city: Mapped[str] = mapped_column(String(100), index=True)  # Add index for city searches
+    city: Mapped[str] = mapped_column(String(100))  # Searched via idx_prop_city_listing_avail / idx_prop_available_city_rent
     state: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)  # Add index for state searches
     zip_code: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
     country: Mapped[str] = mapped_column(String(100))
-    property_type: Mapped[str] = mapped_column(String(50), index=True)  # Add index for property type filter
+    property_type: Mapped[str] = mapped_column(String(50))  # Filtered via idx_prop_type_bed_rent
     listing_type: Mapped[str] = mapped_column(String(50), index=True)  # Add index for listing type filter
     bedrooms: Mapped[int] = mapped_column(Integer)
     bathrooms: Mapped[float] = mapped_column(Float)
     square_feet: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     lot_size: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
-    rent_amount: Mapped[float] = mapped_column(Float, index=True)  # Add index for price filtering
-    rent_amount_usd: Mapped[Optional[float]] = mapped_column(Float, nullable=True, index=True)  # Add index for USD price filtering
-    security_deposit: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rent_amount: Mapped[float] = mapped_column(Money, index=True)  # Add index for price filtering
+    rent_amount_usd: Mapped[Optional[float]] = mapped_column(Money, nullable=True, index=True)  # Add index for USD price filtering
+    security_deposit: Mapped[Optional[float]] = mapped_column(Money, nullable=True)
     lease_duration: Mapped[int] = mapped_column(Integer)  # months
     available_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    is_available: Mapped[bool] = mapped_column(Boolean, default=True, index=True)  # Add index for availability filter
+    is_available: Mapped[bool] = mapped_column(Boolean, default=True)  # Covered by the is_available partial indexes
     is_furnished: Mapped[bool] = mapped_column(Boolean, default=False)
     pets_allowed: Mapped[bool] = mapped_column(Boolean, default=False)
     smoking_allowed: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -97,39 +183,46 @@ class Property(Base):
     utilities_included: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     district: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)  # Add index for district filter
     urban_area: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)  # Add index for urban area filter
-    latitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
-    longitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    latitude: Mapped[Optional[float]] = mapped_column(Coordinate, nullable=True)
+    longitude: Mapped[Optional[float]] = mapped_column(Coordinate, nullable=True)
     floor_number: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     total_floors: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    external_id: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, index=True)
+    primary_image_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)  # Copy of the primary PropertyImage.image_url for list cards
+    search_vector: Mapped[Optional[Any]] = mapped_column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True))  # Stored generated column
+    external_id: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     source: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     user_type: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     last_scraped: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)  # Add index for owner queries
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)  # Add index for date sorting
-    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())  # Range scans via idx_prop_created_brin
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by the set_updated_at trigger
     
     # Relationships
     owner: Mapped["User"] = relationship("User", back_populates="properties")
-    parameters: Mapped[List["PropertyParameter"]] = relationship("PropertyParameter", back_populates="property", cascade="all, delete-orphan")
-    prices: Mapped[List["PropertyPrice"]] = relationship("PropertyPrice", back_populates="property", cascade="all, delete-orphan")
+    # Child rows are removed by ON DELETE CASCADE, so deleting a property never loads them
+    parameters: Mapped[List["PropertyParameter"]] = relationship("PropertyParameter", back_populates="property", cascade="all, delete-orphan", passive_deletes=True)
+    prices: Mapped[List["PropertyPrice"]] = relationship("PropertyPrice", back_populates="property", cascade="all, delete-orphan", passive_deletes=True)
     applications: Mapped[List["RentalApplication"]] = relationship("RentalApplication", back_populates="property")
-    images: Mapped[List["PropertyImage"]] = relationship("PropertyImage", back_populates="property", cascade="all, delete-orphan")
+    # Serialized with every property response, so batch-load them for the whole result set
+    images: Mapped[List["PropertyImage"]] = relationship("PropertyImage", back_populates="property", cascade="all, delete-orphan", passive_deletes=True, lazy="selectin")
     amenities: Mapped[List["Amenity"]] = relationship(
         "Amenity",
         secondary=property_amenities,
-        back_populates="properties"
+        back_populates="properties",
+        passive_deletes=True,
+        lazy="selectin"
     )
     saved_by_users: Mapped[List["User"]] = relationship(
         "User", 
         secondary=saved_properties, 
-        back_populates="saved_properties"
+        back_populates="saved_properties",
+        passive_deletes=True
     )
 
 class Amenity(Base):
     __tablename__ = "amenities"
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True)  # Georgian name (default)
     name_en: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # English name
     name_ru: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # Russian name
@@ -149,7 +242,7 @@ class Amenity(Base):
 class Parameter(Base):
     __tablename__ = "parameters"
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     external_id: Mapped[int] = mapped_column(Integer, unique=True, index=True)  # ID from external API
     key: Mapped[str] = mapped_column(String(100), index=True)
     sort_index: Mapped[int] = mapped_column(Integer)
@@ -168,9 +261,13 @@ class Parameter(Base):
 
 class PropertyParameter(Base):
     __tablename__ = "property_parameters"
+    __table_args__ = (
+        # One row per (property, parameter); lets the scraper upsert instead of delete + re-insert
+        UniqueConstraint('property_id', 'parameter_id', name='uq_pp_prop_param'),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id"))
+    id: Mapped[int] = mapped_column(primary_key=True)
+    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id", ondelete="CASCADE"))
     parameter_id: Mapped[int] = mapped_column(ForeignKey("parameters.id"))
     parameter_value: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # For parameters with values
     parameter_select_name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
@@ -181,22 +278,89 @@ class PropertyParameter(Base):
 
 class PropertyPrice(Base):
     __tablename__ = "property_prices"
+    __table_args__ = (
+        # One price per currency; also serves lookups by property_id
+        UniqueConstraint('property_id', 'currency_type', name='uq_price_prop_currency'),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id"))
-    currency_type: Mapped[str] = mapped_column(String(10))  # '1' for USD, '2' for GEL, '3' for EUR
-    price_total: Mapped[float] = mapped_column(Float)
-    price_square: Mapped[float] = mapped_column(Float)  # Price per square meter
+    id: Mapped[int] = mapped_column(primary_key=True)
+    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id", ondelete="CASCADE"))
+    currency_type: Mapped[int] = mapped_column(SmallInteger, ForeignKey("currencies.id"))  # CurrencyType: 1 USD, 2 GEL, 3 EUR
+    price_total: Mapped[float] = mapped_column(Money)
+    price_square: Mapped[float] = mapped_column(Money)  # Price per square meter
     
     # Relationships
     property: Mapped["Property"] = relationship("Property", back_populates="prices")
 
+class ImageHost(Base):
+    """URL prefix (scheme + host) shared by many property images"""
+    __tablename__ = "image_hosts"
+    
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    prefix: Mapped[str] = mapped_column(String(200), unique=True)
+
+IMAGE_HOST_RE = re.compile(r"^https?://[^/]+/")
+
+# prefix -> image_hosts id for committed rows only; the table only ever grows, so entries never go stale
+_image_host_ids: Dict[str, int] = {}
+
+def split_image_url(db: Session, url: str) -> Tuple[Optional[int], str]:
+    """Split an absolute URL into (image_hosts id, path); relative URLs keep host_id None.
+    
+    A new prefix is inserted in the caller's transaction and only cached once that commits.
+    """
+    match = IMAGE_HOST_RE.match(url)
+    if not match or len(match.group(0)) > 200:
+        return None, url
+    prefix = match.group(0)
+    # prefix -> id for hosts this transaction inserted itself (None once a savepoint rollback makes it unsure)
+    own = db.info.setdefault("new_image_hosts", {})
+    host_id = _image_host_ids.get(prefix) or own.get(prefix)
+    if host_id is None:
+        host_id = db.execute(
+            pg_insert(ImageHost.__table__).values(prefix=prefix)
+            .on_conflict_do_nothing(index_elements=["prefix"]).returning(ImageHost.id)
+        ).scalar()
+        if host_id is None:
+            host_id = db.execute(select(ImageHost.id).where(ImageHost.prefix == prefix)).scalar_one()
+            if prefix not in own:
+                # Inserted and committed by another transaction
+                _image_host_ids[prefix] = host_id
+                return host_id, url[len(prefix):]
+        own[prefix] = host_id
+    return host_id, url[len(prefix):]
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_image_hosts(session: Session) -> None:
+    _image_host_ids.update(
+        (prefix, host_id) for prefix, host_id in session.info.pop("new_image_hosts", {}).items()
+        if host_id is not None
+    )
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_image_hosts(session: Session, previous_transaction) -> None:
+    own = session.info.get("new_image_hosts")
+    if not own:
+        return
+    if previous_transaction.nested:
+        # The savepoint may have held some of the inserts: keep the prefixes marked as ours but
+        # drop their ids, the next split_image_url looks them up again
+        for prefix in own:
+            own[prefix] = None
+    else:
+        session.info.pop("new_image_hosts")
+
 class PropertyImage(Base):
     __tablename__ = "property_images"
+    __table_args__ = (
+        Index('idx_img_prop_primary', 'property_id', 'is_primary'),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id"))
-    image_url: Mapped[str] = mapped_column(String(500))  # Image URL
+    id: Mapped[int] = mapped_column(primary_key=True)
+    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id", ondelete="CASCADE"))
+    # Image URL stored split: the shared host prefix lives in image_hosts, only the path is kept per row
+    host_id: Mapped[Optional[int]] = mapped_column(SmallInteger, ForeignKey("image_hosts.id"), nullable=True)
+    path: Mapped[str] = mapped_column(String(500))
     caption: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # Image caption
     is_primary: Mapped[bool] = mapped_column(Boolean, default=False)  # Primary image flag
     order_index: Mapped[int] = mapped_column(Integer, default=0)
@@ -206,11 +370,33 @@ class PropertyImage(Base):
     
     # Relationships
     property: Mapped["Property"] = relationship("Property", back_populates="images")
+    # Joined into every image load (image_hosts is a handful of rows), so image_url never queries
+    host: Mapped[Optional["ImageHost"]] = relationship("ImageHost", lazy="joined")
+    
+    @hybrid_property
+    def image_url(self) -> str:
+        """Full image URL (host prefix + path); set it through split_image_url"""
+        if self.host is None:
+            return self.path
+        return self.host.prefix + self.path
+    
+    @image_url.inplace.expression
+    @classmethod
+    def _image_url_expression(cls):
+        host_prefix = select(ImageHost.prefix).where(ImageHost.id == cls.host_id).scalar_subquery()
+        return func.coalesce(host_prefix, "") + cls.path
 
 class RentalApplication(Base):
     __tablename__ = "rental_applications"
+    __table_args__ = (
+        # One application per tenant and property; also serves the tenant's "my applications" lookup
+        UniqueConstraint('tenant_id', 'property_id', name='uq_app_tenant_property'),
+        # Newest-first keyset pages of a tenant's / a property's applications
+        Index('idx_app_tenant_created', 'tenant_id', 'created_at', 'id'),
+        Index('idx_app_property_created', 'property_id', 'created_at', 'id'),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     property_id: Mapped[int] = mapped_column(ForeignKey("properties.id"))
     tenant_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     
@@ -218,21 +404,21 @@ class RentalApplication(Base):
     status: Mapped[str] = mapped_column(String(50), default="pending")  # pending, approved, rejected, withdrawn
     move_in_date: Mapped[datetime] = mapped_column(DateTime)
     lease_duration: Mapped[int] = mapped_column(Integer)  # months
-    monthly_income: Mapped[float] = mapped_column(Float)
+    monthly_income: Mapped[float] = mapped_column(Money)
     employment_status: Mapped[str] = mapped_column(String(100))
     employer_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     employer_contact: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     
     # Personal references
-    references: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON string of references
+    references: Mapped[Optional[Any]] = mapped_column(JSONB, nullable=True)  # JSON list/object of references
     
     # Additional info
-    pets: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON string of pet information
+    pets: Mapped[Optional[Any]] = mapped_column(JSONB, nullable=True)  # JSON pet information
     additional_notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by the set_updated_at trigger
     
     # Relationships
     property: Mapped["Property"] = relationship("Property", back_populates="applications")
@@ -246,6 +432,11 @@ def get_db():
     finally:
         db.close()
 
+# Async session dependency: queries await asyncpg instead of blocking the event loop
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Database session context manager for scraper
 def get_database_session():
     """Returns a database session as a context manager for use in scraper."""
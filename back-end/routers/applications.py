@@ -1,7 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+from sqlalchemy import cast, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from datetime import datetime
 from typing import List, Optional
-from database import get_db, RentalApplication, Property, User
+from database import get_async_db, RentalApplication, Property, User
 from schemas import (
     RentalApplicationCreate, RentalApplicationUpdate, RentalApplicationResponse,
     MessageResponse, ApplicationStatus
@@ -10,65 +15,85 @@ from auth import get_current_active_user, require_landlord
 
 router = APIRouter(prefix="/applications", tags=["Rental Applications"])
 
+# Validates a whole page of applications in one call instead of one model_validate per row
+APPLICATION_LIST_ADAPTER = TypeAdapter(List[RentalApplicationResponse])
+
+# Permission checks read application.property: join it into the application query, without its images
+APPLICATION_PROPERTY_OPTIONS = (joinedload(RentalApplication.property).lazyload(Property.images),)
+
+def paginate_applications(query, skip: int, limit: int,
+                          after_created_at: Optional[datetime], after_id: Optional[int]):
+    """Newest first; continue after (after_created_at, after_id) when given, else fall back to OFFSET"""
+    query = query.order_by(RentalApplication.created_at.desc(), RentalApplication.id.desc())
+    if after_created_at is not None and after_id is not None:
+        # Reads only the next `limit` index entries instead of scanning and discarding `skip` rows
+        return query.where(
+            tuple_(RentalApplication.created_at, RentalApplication.id) < (after_created_at, after_id)
+        ).limit(limit)
+    return query.offset(skip).limit(limit)
+
 @router.post("/", response_model=RentalApplicationResponse, status_code=status.HTTP_201_CREATED)
 async def create_application(
     application_data: RentalApplicationCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new rental application"""
-    # Check if property exists and is available
-    property_obj = db.query(Property).filter(Property.id == application_data.property_id).first()
-    if not property_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Property not found"
-        )
-    
-    if not property_obj.is_available:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Property is not available for rent"
+    application_dict = application_data.model_dump()
+    application_dict["tenant_id"] = current_user.id
+    
+    # One INSERT ... SELECT FROM properties ... ON CONFLICT DO NOTHING: inserts nothing unless the
+    # property exists and is available and the tenant has no application for it yet
+    # (uq_app_tenant_property; no conflict target, so it also works before that constraint exists).
+    # Values are CAST so the SELECT list isn't typed as text
+    columns = RentalApplication.__table__.c
+    stmt = pg_insert(RentalApplication.__table__).from_select(
+        list(application_dict),
+        select(*(
+            Property.id if name == "property_id" else cast(value, columns[name].type)
+            for name, value in application_dict.items()
+        )).where(Property.id == application_data.property_id, Property.is_available == True)
+    ).on_conflict_do_nothing().returning(*columns)
+    
+    row = (await db.execute(stmt)).first()
+    await db.commit()
+    
+    if row is None:
+        # Nothing inserted: only now look at the property to tell which error it is
+        is_available = await db.scalar(
+            select(Property.is_available).where(Property.id == application_data.property_id)
         )
-    
-    # Check if user already has an application for this property
-    existing_app = db.query(RentalApplication).filter(
-        RentalApplication.property_id == application_data.property_id,
-        RentalApplication.tenant_id == current_user.id
-    ).first()
-    
-    if existing_app:
+        if is_available is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Property not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You already have an application for this property"
+            detail="You already have an application for this property" if is_available
+            else "Property is not available for rent"
         )
     
-    # Create application
-    application_dict = application_data.model_dump()
-    db_application = RentalApplication(**application_dict, tenant_id=current_user.id)
-    
-    db.add(db_application)
-    db.commit()
-    db.refresh(db_application)
-    
-    return RentalApplicationResponse.model_validate(db_application)
+    return RentalApplicationResponse.model_validate(dict(row._mapping))
 
 @router.get("/my-applications", response_model=List[RentalApplicationResponse])
 async def get_my_applications(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     status_filter: Optional[ApplicationStatus] = None,
+    after_created_at: Optional[datetime] = Query(None, description="Keyset: created_at of the last application seen"),
+    after_id: Optional[int] = Query(None, description="Keyset: id of the last application seen"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's rental applications"""
-    query = db.query(RentalApplication).filter(RentalApplication.tenant_id == current_user.id)
+    query = select(RentalApplication).where(RentalApplication.tenant_id == current_user.id)
     
     if status_filter:
-        query = query.filter(RentalApplication.status == status_filter.value)
+        query = query.where(RentalApplication.status == status_filter.value)
     
-    applications = query.offset(skip).limit(limit).all()
-    return [RentalApplicationResponse.model_validate(app) for app in applications]
+    applications = (await db.scalars(paginate_applications(query, skip, limit, after_created_at, after_id))).all()
+    return APPLICATION_LIST_ADAPTER.validate_python(applications, from_attributes=True)
 
 @router.get("/property/{property_id}", response_model=List[RentalApplicationResponse])
 async def get_property_applications(
@@ -76,41 +101,45 @@ async def get_property_applications(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     status_filter: Optional[ApplicationStatus] = None,
+    after_created_at: Optional[datetime] = Query(None, description="Keyset: created_at of the last application seen"),
+    after_id: Optional[int] = Query(None, description="Keyset: id of the last application seen"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get applications for a specific property (property owner or admin only)"""
-    # Check if property exists
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
-    if not property_obj:
+    # Check if property exists (only its owner is needed, not the full row and images)
+    owner_id = await db.scalar(select(Property.owner_id).where(Property.id == property_id))
+    if owner_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Property not found"
         )
     
     # Check permissions
-    if property_obj.owner_id != current_user.id and current_user.role != "admin":
+    if owner_id != current_user.id and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view applications for this property"
         )
     
-    query = db.query(RentalApplication).filter(RentalApplication.property_id == property_id)
+    query = select(RentalApplication).where(RentalApplication.property_id == property_id)
     
     if status_filter:
-        query = query.filter(RentalApplication.status == status_filter.value)
+        query = query.where(RentalApplication.status == status_filter.value)
     
-    applications = query.offset(skip).limit(limit).all()
-    return [RentalApplicationResponse.model_validate(app) for app in applications]
+    applications = (await db.scalars(paginate_applications(query, skip, limit, after_created_at, after_id))).all()
+    return APPLICATION_LIST_ADAPTER.validate_python(applications, from_attributes=True)
 
 @router.get("/{application_id}", response_model=RentalApplicationResponse)
 async def get_application(
     application_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific application (applicant or property owner only)"""
-    application = db.query(RentalApplication).filter(RentalApplication.id == application_id).first()
+    application = await db.scalar(
+        select(RentalApplication).options(*APPLICATION_PROPERTY_OPTIONS).where(RentalApplication.id == application_id)
+    )
     if not application:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -133,10 +162,12 @@ async def update_application_status(
     application_id: int,
     status_update: ApplicationStatus,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update application status (property owner or admin only)"""
-    application = db.query(RentalApplication).filter(RentalApplication.id == application_id).first()
+    application = await db.scalar(
+        select(RentalApplication).options(*APPLICATION_PROPERTY_OPTIONS).where(RentalApplication.id == application_id)
+    )
     if not application:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,20 +186,31 @@ async def update_application_status(
     
     # If approved, mark property as unavailable and reject other pending applications
     if status_update == ApplicationStatus.APPROVED:
-        application.property.is_available = False
+        # Claims the property row: a concurrent approval blocks on the row lock, then
+        # re-checks is_available, matches nothing and is refused
+        claimed = (await db.execute(
+            update(Property).where(
+                Property.id == application.property_id, Property.is_available == True
+            ).values(is_available=False).returning(Property.id)
+        )).first()
+        if claimed is None:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Property is not available for rent"
+            )
         
-        # Reject other pending applications for this property
-        other_applications = db.query(RentalApplication).filter(
-            RentalApplication.property_id == application.property_id,
-            RentalApplication.id != application_id,
-            RentalApplication.status == "pending"
-        ).all()
-        
-        for other_app in other_applications:
-            other_app.status = "rejected"
+        # Reject other pending applications for this property in one UPDATE, without loading them
+        await db.execute(
+            update(RentalApplication).where(
+                RentalApplication.property_id == application.property_id,
+                RentalApplication.id != application_id,
+                RentalApplication.status == "pending"
+            ).values(status="rejected")
+        )
     
-    db.commit()
-    db.refresh(application)
+    await db.commit()
+    await db.refresh(application)
     
     return RentalApplicationResponse.model_validate(application)
 
@@ -176,10 +218,10 @@ async def update_application_status(
 async def delete_application(
     application_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an application (applicant only, and only if pending)"""
-    application = db.query(RentalApplication).filter(RentalApplication.id == application_id).first()
+    application = await db.get(RentalApplication, application_id)
     if not application:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -200,7 +242,7 @@ async def delete_application(
             detail="Can only delete pending applications"
         )
     
-    db.delete(application)
-    db.commit()
+    await db.delete(application)
+    await db.commit()
     
     return {"message": "Application deleted successfully"}
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload, selectinload
-from sqlalchemy import and_, or_
-from typing import List, Optional
-from database import get_db, Property, User, Amenity, PropertyImage, property_amenities, saved_properties
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, selectinload, raiseload, noload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select, lambda_stmt, tuple_
+from datetime import datetime
+from typing import Dict, List, Optional
+from database import (
+    get_db, get_async_db, Property, User, Amenity, PropertyImage, property_amenities, saved_properties,
+    split_image_url
+)
 from schemas import (
     PropertyCreate, PropertyUpdate, PropertyResponse, PropertyListResponse,
     AmenityResponse, PropertySearchFilters, MessageResponse,
@@ -10,9 +16,172 @@ from schemas import (
     PropertyType, PropertyPaginatedResponse, PaginationInfo
 )
 from auth import get_current_active_user, require_landlord
+import re
+import time
 
 router = APIRouter(prefix="/properties", tags=["Properties"])
 
+# Images are batch-loaded in one query, with the host prefix image_url reads (raiseload("*")
+# also reaches the images' relationships, so host has to be named); amenities are attached from
+# the in-process amenity map. Any other relationship access raises instead of silently issuing
+# per-row SELECTs
+PROPERTY_IMAGE_OPTIONS = selectinload(Property.images).joinedload(PropertyImage.host)
+PROPERTY_RESPONSE_OPTIONS = (
+    PROPERTY_IMAGE_OPTIONS,
+    noload(Property.amenities),
+    raiseload("*"),
+)
+
+# Amenities are reference data: cache them per process and re-check the table version every minute
+AMENITY_CACHE_CHECK_SECONDS = 60
+_amenity_cache = {"version": None, "checked_at": 0.0, "by_id": {}}
+
+def get_amenity_map(db: Session) -> Dict[int, AmenityResponse]:
+    """All amenities by id, reloaded only when max(id)/count(*) of the table changes"""
+    now = time.monotonic()
+    if _amenity_cache["version"] is None or now - _amenity_cache["checked_at"] >= AMENITY_CACHE_CHECK_SECONDS:
+        version = tuple(db.execute(select(func.max(Amenity.id), func.count(Amenity.id))).one())
+        if version != _amenity_cache["version"]:
+            _amenity_cache["by_id"] = {
+                amenity.id: AmenityResponse.model_validate(amenity)
+                for amenity in db.query(Amenity).order_by(Amenity.id)
+            }
+            _amenity_cache["version"] = version
+        _amenity_cache["checked_at"] = now
+    return _amenity_cache["by_id"]
+
+# Flat columns of the list schemas, selected as plain rows so the list endpoint skips ORM hydration
+PROPERTY_LIST_COLS = tuple(
+    Property.__table__.c[name] for name in PropertyListResponse.model_fields
+    if name not in ("images", "amenities")
+)
+PROPERTY_IMAGE_COLS = tuple(
+    PropertyImage.image_url.label("image_url") if name == "image_url" else PropertyImage.__table__.c[name]
+    for name in PropertyImageResponse.model_fields
+)
+
+async def fetch_property_rows(db: AsyncSession, stmt) -> list:
+    """Run a select(*PROPERTY_LIST_COLS) and return JSON-ready dicts with images and amenities attached"""
+    rows = [row._asdict() for row in await db.execute(stmt)]
+    if not rows:
+        return rows
+    by_id = {}
+    for row in rows:
+        row["images"] = []
+        row["amenities"] = []
+        by_id[row["id"]] = row
+    
+    for image in await db.execute(
+        select(*PROPERTY_IMAGE_COLS).where(PropertyImage.property_id.in_(by_id)).order_by(PropertyImage.id)
+    ):
+        by_id[image.property_id]["images"].append(image._asdict())
+    
+    amenity_map = await db.run_sync(get_amenity_map)
+    for property_id, amenity_id in await db.execute(
+        select(property_amenities.c.property_id, property_amenities.c.amenity_id)
+        .where(property_amenities.c.property_id.in_(by_id))
+    ):
+        if amenity_id in amenity_map:
+            by_id[property_id]["amenities"].append(amenity_map[amenity_id].model_dump())
+    return rows
+
+def serialize_properties(db: Session, properties: List[Property], schema=PropertyListResponse) -> list:
+    """Validate properties into schema, filling amenities from the cached amenity map"""
+    if not properties:
+        return []
+    amenity_ids = {prop.id: [] for prop in properties}
+    for property_id, amenity_id in db.execute(
+        select(property_amenities.c.property_id, property_amenities.c.amenity_id)
+        .where(property_amenities.c.property_id.in_(amenity_ids))
+    ):
+        amenity_ids[property_id].append(amenity_id)
+    
+    amenity_map = get_amenity_map(db)
+    return [
+        schema.model_validate(prop).model_copy(update={
+            "amenities": [amenity_map[a] for a in amenity_ids[prop.id] if a in amenity_map]
+        })
+        for prop in properties
+    ]
+
+def build_search_tsquery(query: str) -> Optional[str]:
+    """Turn free text into a tsquery matching every word as a prefix"""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+def apply_property_filters(query, city: Optional[str], state: Optional[str], property_type: Optional[str],
+                           min_rent: Optional[float], max_rent: Optional[float],
+                           min_bedrooms: Optional[int], max_bedrooms: Optional[int],
+                           pets_allowed: Optional[bool], is_furnished: Optional[bool], currency: Optional[str]):
+    """Filters shared by GET /properties and /properties/count, so the page and its total always agree"""
+    if city:
+        query = query.filter(Property.city.ilike(f"%{city}%"))
+    if state:
+        query = query.filter(Property.state.ilike(f"%{state}%"))
+    if property_type:
+        query = query.filter(Property.property_type == property_type)
+    
+    # Price filters - handle currency selection
+    if min_rent is not None or max_rent is not None:
+        if currency and currency.upper() == "USD":
+            # Filter by USD amount
+            if min_rent is not None:
+                query = query.filter(
+                    or_(
+                        Property.rent_amount_usd >= min_rent,
+                        and_(Property.rent_amount_usd.is_(None), Property.rent_amount >= min_rent * 2.7)
+                    )
+                )
+            if max_rent is not None:
+                query = query.filter(
+                    or_(
+                        Property.rent_amount_usd <= max_rent,
+                        and_(Property.rent_amount_usd.is_(None), Property.rent_amount <= max_rent * 2.7)
+                    )
+                )
+        else:
+            # Filter by GEL amount (default)
+            if min_rent is not None:
+                query = query.filter(Property.rent_amount >= min_rent)
+            if max_rent is not None:
+                query = query.filter(Property.rent_amount <= max_rent)
+    
+    if min_bedrooms is not None:
+        query = query.filter(Property.bedrooms >= min_bedrooms)
+    if max_bedrooms is not None:
+        query = query.filter(Property.bedrooms <= max_bedrooms)
+    if pets_allowed is not None:
+        query = query.filter(Property.pets_allowed == pets_allowed)
+    if is_furnished is not None:
+        query = query.filter(Property.is_furnished == is_furnished)
+    return query
+
+def paginate_by_created(query, descending: bool, skip: int, limit: int,
+                        after_created_at: Optional[datetime], after_id: Optional[int]):
+    """Order by (created_at, id); continue after (after_created_at, after_id) when given, else fall back to OFFSET"""
+    if descending:
+        query = query.order_by(Property.created_at.desc(), Property.id.desc())
+    else:
+        query = query.order_by(Property.created_at.asc(), Property.id.asc())
+    if after_created_at is not None and after_id is not None:
+        # Reads only the next `limit` index entries instead of scanning and discarding `skip` rows
+        key = tuple_(Property.created_at, Property.id)
+        return query.where(
+            key < (after_created_at, after_id) if descending else key > (after_created_at, after_id)
+        ).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def sync_primary_image_url(db: Session, property_obj: Property) -> None:
+    """Copy the current primary image URL onto the property row"""
+    db.flush()
+    property_obj.primary_image_url = db.query(PropertyImage.image_url).filter(
+        PropertyImage.property_id == property_obj.id
+    ).order_by(
+        PropertyImage.is_primary.desc(), PropertyImage.order_index, PropertyImage.id
+    ).limit(1).scalar()
+
 @router.get("/", response_model=List[PropertyListResponse])
 async def get_properties(
     skip: int = Query(0, ge=0),
@@ -26,50 +195,37 @@ async def get_properties(
     max_bedrooms: Optional[int] = Query(None, ge=0),
     pets_allowed: Optional[bool] = None,
     is_furnished: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    currency: Optional[str] = Query("GEL", description="Currency for price filtering (GEL or USD)"),
+    sort_by: Optional[str] = Query("date", description="Sort by field (date or price)"),
+    sort_order: Optional[str] = Query("desc", description="Sort order (asc/desc)"),
+    after_created_at: Optional[datetime] = Query(None, description="Keyset (date sort): created_at of the last property seen"),
+    after_id: Optional[int] = Query(None, description="Keyset (date sort): id of the last property seen"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all available properties with filtering"""
-    query = db.query(Property).options(joinedload(Property.images)).filter(Property.is_available == True)
+    # Plain column rows straight to ORJSONResponse: no ORM instances, no response_model re-validation
+    query_obj = apply_property_filters(
+        select(*PROPERTY_LIST_COLS).filter(Property.is_available == True),
+        city, state, property_type, min_rent, max_rent,
+        min_bedrooms, max_bedrooms, pets_allowed, is_furnished, currency
+    )
     
-    # Apply filters
-    if property_type:
-        query_obj = query_obj.filter(Property.property_type.ilike(f"%{property_type}%"))
-    if min_price:
-        query_obj = query_obj.filter(Property.rent_amount_usd >= min_price)
-    if max_price:
-        query_obj = query_obj.filter(Property.rent_amount_usd <= max_price)
-    if bedrooms:
-        query_obj = query_obj.filter(Property.bedrooms >= bedrooms)
-    if bathrooms:
-        query_obj = query_obj.filter(Property.bathrooms >= bathrooms)
-    if min_square_feet:
-        query_obj = query_obj.filter(Property.square_feet >= min_square_feet)
-    if max_square_feet:
-        query_obj = query_obj.filter(Property.square_feet <= max_square_feet)
-    if city:
-        query_obj = query_obj.filter(Property.city.ilike(f"%{city}%"))
-    if state:
-        query_obj = query_obj.filter(and_(Property.state.is_not(None), Property.state.ilike(f"%{state}%")))
-    if urban_area:
-        query_obj = query_obj.filter(and_(Property.urban_area.is_not(None), Property.urban_area.ilike(f"%{urban_area}%")))
-    if currency:
-        query_obj = query_obj.filter(Property.currency == currency)
-        
     # Apply ordering
-    if sort_by == "price_asc":
-        query_obj = query_obj.order_by(Property.rent_amount_usd.asc())
-    elif sort_by == "price_desc":
-        query_obj = query_obj.order_by(Property.rent_amount_usd.desc())
-    elif sort_by == "date_desc":
-        query_obj = query_obj.order_by(Property.created_at.desc())
-    else:  # default
-        query_obj = query_obj.order_by(Property.created_at.desc())
-    
-    properties = query.offset(skip).limit(limit).all()
-    return [PropertyListResponse.model_validate(prop) for prop in properties]
+    if sort_by == "price":
+        if sort_order == "asc":
+            query_obj = query_obj.order_by(Property.rent_amount.asc())
+        else:
+            query_obj = query_obj.order_by(Property.rent_amount.desc())
+        query_obj = query_obj.offset(skip).limit(limit)
+    else:
+        query_obj = paginate_by_created(query_obj, sort_order != "asc", skip, limit, after_created_at, after_id)
+    
+    rows = await fetch_property_rows(db, query_obj)
+    return ORJSONResponse(content=rows)
 
 @router.get("/search", response_model=List[PropertyListResponse])
 async def search_properties(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     query: Optional[str] = Query(None, description="General search query"),
@@ -96,102 +252,126 @@ async def search_properties(
     currency: Optional[str] = Query("GEL", description="Currency for price filtering (GEL or USD)"),
     sort_by: Optional[str] = Query("date", description="Sort by field"),
     sort_order: Optional[str] = Query("desc", description="Sort order (asc/desc)"),
-    db: Session = Depends(get_db)
+    after_created_at: Optional[datetime] = Query(None, description="Keyset (date sort): created_at of the last property seen"),
+    after_id: Optional[int] = Query(None, description="Keyset (date sort): id of the last property seen"),
+    with_total: bool = Query(False, description="Also return the number of matches in X-Total-Count"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Search properties with advanced filters"""
-    # Use selectinload for better performance with one-to-many relationships
-    query_obj = db.query(Property).options(
-        selectinload(Property.images)  # Only load essential image data
-    ).filter(Property.is_available == True)
+    # Built as a lambda statement: construction is cached per filter shape and
+    # only the closure values are re-bound on each request
+    if with_total:
+        # count(*) OVER () is evaluated before LIMIT: the page and the total come from one scan,
+        # so the client can skip the separate /search/count round trip
+        stmt = lambda_stmt(lambda: select(Property, func.count().over()).options(*PROPERTY_RESPONSE_OPTIONS).where(Property.is_available == True))
+    else:
+        stmt = lambda_stmt(lambda: select(Property).options(*PROPERTY_RESPONSE_OPTIONS).where(Property.is_available == True))
     
-    # General search query (search in title, description, address)
+    # General search query (title, description, address in any language; GIN-indexed)
     if query:
-        search_filter = or_(
-            Property.title.ilike(f"%{query}%"),
-            Property.description.ilike(f"%{query}%"),
-            Property.address.ilike(f"%{query}%"),
-            Property.city.ilike(f"%{query}%"),
-            Property.state.ilike(f"%{query}%")
-        )
-        query_obj = query_obj.filter(search_filter)
+        tsquery = build_search_tsquery(query)
+        if tsquery is not None:
+            stmt += lambda s: s.where(Property.search_vector.op("@@")(func.to_tsquery("simple", tsquery)))
     
     # Location filters
     if city:
-        query_obj = query_obj.filter(Property.city.ilike(f"%{city}%"))
+        city_pattern = f"%{city}%"
+        stmt += lambda s: s.where(Property.city.ilike(city_pattern))
     if state:
-        query_obj = query_obj.filter(and_(Property.state.is_not(None), Property.state == state))
+        stmt += lambda s: s.where(Property.state == state)
     if urban_area:
-        query_obj = query_obj.filter(and_(Property.urban_area.is_not(None), Property.urban_area == urban_area))
+        stmt += lambda s: s.where(Property.urban_area == urban_area)
     if district:
-        query_obj = query_obj.filter(and_(Property.district.is_not(None), Property.district == district))
+        stmt += lambda s: s.where(Property.district == district)
     
     # Property type filter
     if property_type:
-        query_obj = query_obj.filter(Property.property_type == property_type)
+        stmt += lambda s: s.where(Property.property_type == property_type)
     
     # Listing type filter
     if listing_type:
-        query_obj = query_obj.filter(Property.listing_type == listing_type)
+        stmt += lambda s: s.where(Property.listing_type == listing_type)
     
     # Bedroom filters
     if min_bedrooms is not None:
-        query_obj = query_obj.filter(Property.bedrooms >= min_bedrooms)
+        stmt += lambda s: s.where(Property.bedrooms >= min_bedrooms)
     if max_bedrooms is not None:
-        query_obj = query_obj.filter(Property.bedrooms <= max_bedrooms)
+        stmt += lambda s: s.where(Property.bedrooms <= max_bedrooms)
     
     # Bathroom filters
     if min_bathrooms is not None:
-        query_obj = query_obj.filter(Property.bathrooms >= min_bathrooms)
+        stmt += lambda s: s.where(Property.bathrooms >= min_bathrooms)
     if max_bathrooms is not None:
-        query_obj = query_obj.filter(Property.bathrooms <= max_bathrooms)
+        stmt += lambda s: s.where(Property.bathrooms <= max_bathrooms)
     
     # Price filters
     if min_rent is not None:
-        query_obj = query_obj.filter(Property.rent_amount >= min_rent)
+        stmt += lambda s: s.where(Property.rent_amount >= min_rent)
     if max_rent is not None:
-        query_obj = query_obj.filter(Property.rent_amount <= max_rent)
+        stmt += lambda s: s.where(Property.rent_amount <= max_rent)
     
     # Area filters
     if min_square_feet is not None:
-        query_obj = query_obj.filter(Property.square_feet >= min_square_feet)
+        stmt += lambda s: s.where(Property.square_feet >= min_square_feet)
     if max_square_feet is not None:
-        query_obj = query_obj.filter(Property.square_feet <= max_square_feet)
+        stmt += lambda s: s.where(Property.square_feet <= max_square_feet)
     
     # Feature filters
     if pets_allowed is not None:
-        query_obj = query_obj.filter(Property.pets_allowed == pets_allowed)
+        stmt += lambda s: s.where(Property.pets_allowed == pets_allowed)
     if is_furnished is not None:
-        query_obj = query_obj.filter(Property.is_furnished == is_furnished)
+        stmt += lambda s: s.where(Property.is_furnished == is_furnished)
     if smoking_allowed is not None:
-        query_obj = query_obj.filter(Property.smoking_allowed == smoking_allowed)
+        stmt += lambda s: s.where(Property.smoking_allowed == smoking_allowed)
     
     # Year built filters
     if year_built_min is not None:
-        query_obj = query_obj.filter(Property.year_built >= year_built_min)
+        stmt += lambda s: s.where(Property.year_built >= year_built_min)
     if year_built_max is not None:
-        query_obj = query_obj.filter(Property.year_built <= year_built_max)
+        stmt += lambda s: s.where(Property.year_built <= year_built_max)
     
     # Parking filter
     if parking_spaces_min is not None:
-        query_obj = query_obj.filter(Property.parking_spaces >= parking_spaces_min)
+        stmt += lambda s: s.where(Property.parking_spaces >= parking_spaces_min)
     
     # Sorting
-    if sort_by == "price":
-        order_field = Property.rent_amount
-    elif sort_by == "area":
-        order_field = Property.square_feet
-    elif sort_by == "bedrooms":
-        order_field = Property.bedrooms
-    else:  # default to date
-        order_field = Property.created_at
-    
-    if sort_order == "asc":
-        query_obj = query_obj.order_by(order_field.asc())
+    if sort_by in ("price", "area", "bedrooms"):
+        if sort_by == "price":
+            order_field = Property.rent_amount
+        elif sort_by == "area":
+            order_field = Property.square_feet
+        else:
+            order_field = Property.bedrooms
+        
+        if sort_order == "asc":
+            stmt += lambda s: s.order_by(order_field.asc())
+        else:
+            stmt += lambda s: s.order_by(order_field.desc())
+        stmt += lambda s: s.offset(skip).limit(limit)
+    else:  # default to date, keyset-paginated when the last row's (created_at, id) is given
+        keyset = after_created_at is not None and after_id is not None
+        if sort_order == "asc":
+            stmt += lambda s: s.order_by(Property.created_at.asc(), Property.id.asc())
+            if keyset:
+                stmt += lambda s: s.where(tuple_(Property.created_at, Property.id) > tuple_(after_created_at, after_id))
+        else:
+            stmt += lambda s: s.order_by(Property.created_at.desc(), Property.id.desc())
+            if keyset:
+                stmt += lambda s: s.where(tuple_(Property.created_at, Property.id) < tuple_(after_created_at, after_id))
+        if keyset:
+            stmt += lambda s: s.limit(limit)
+        else:
+            stmt += lambda s: s.offset(skip).limit(limit)
+    
+    if with_total:
+        rows = (await db.execute(stmt)).all()
+        properties = [prop for prop, _ in rows]
+        # A page past the end has no rows to carry the total; leave the header out rather than guess
+        if rows:
+            response.headers["X-Total-Count"] = str(rows[0][1])
     else:
-        query_obj = query_obj.order_by(order_field.desc())
-    
-    properties = query_obj.offset(skip).limit(limit).all()
-    return [PropertyListResponse.model_validate(prop) for prop in properties]
+        properties = (await db.scalars(stmt)).all()
+    return await db.run_sync(serialize_properties, properties)
 
 @router.get("/count")
 async def get_properties_count(
@@ -205,54 +385,17 @@ async def get_properties_count(
     pets_allowed: Optional[bool] = None,
     is_furnished: Optional[bool] = None,
     currency: Optional[str] = Query("GEL", description="Currency for price filtering (GEL or USD)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get count of available properties with filtering"""
-    query = db.query(Property).filter(Property.is_available == True)
-    
-    # Apply same filters as get_properties
-    if city:
-        query = query.filter(Property.city.ilike(f"%{city}%"))
-    if state:
-        query = query.filter(Property.state.ilike(f"%{state}%"))
-    if property_type:
-        query = query.filter(Property.property_type == property_type)
-    
-    # Price filters - handle currency selection
-    if min_rent is not None or max_rent is not None:
-        if currency and currency.upper() == "USD":
-            # Filter by USD amount
-            if min_rent is not None:
-                query = query.filter(
-                    or_(
-                        Property.rent_amount_usd >= min_rent,
-                        and_(Property.rent_amount_usd.is_(None), Property.rent_amount >= min_rent * 2.7)
-                    )
-                )
-            if max_rent is not None:
-                query = query.filter(
-                    or_(
-                        Property.rent_amount_usd <= max_rent,
-                        and_(Property.rent_amount_usd.is_(None), Property.rent_amount <= max_rent * 2.7)
-                    )
-                )
-        else:
-            # Filter by GEL amount (default)
-            if min_rent is not None:
-                query = query.filter(Property.rent_amount >= min_rent)
-            if max_rent is not None:
-                query = query.filter(Property.rent_amount <= max_rent)
-    
-    if min_bedrooms is not None:
-        query = query.filter(Property.bedrooms >= min_bedrooms)
-    if max_bedrooms is not None:
-        query = query.filter(Property.bedrooms <= max_bedrooms)
-    if pets_allowed is not None:
-        query = query.filter(Property.pets_allowed == pets_allowed)
-    if is_furnished is not None:
-        query = query.filter(Property.is_furnished == is_furnished)
+    # Plain SELECT count(*) FROM properties WHERE ...: no subquery wrapper, no columns loaded
+    query = apply_property_filters(
+        select(func.count()).select_from(Property).filter(Property.is_available == True),
+        city, state, property_type, min_rent, max_rent,
+        min_bedrooms, max_bedrooms, pets_allowed, is_furnished, currency
+    )
     
-    total_count = query.count()
+    total_count = await db.scalar(query)
     return {"total_count": total_count}
 
 @router.get("/search/count")
@@ -279,7 +422,7 @@ async def get_search_count(
     year_built_max: Optional[int] = Query(None, ge=1800, le=2030, description="Maximum year built"),
     parking_spaces_min: Optional[int] = Query(None, ge=0, description="Minimum parking spaces"),
     currency: Optional[str] = Query("GEL", description="Currency for price filtering (GEL or USD)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get count of search results with advanced filters - OPTIMIZED"""
     # Import cache locally to avoid circular imports
@@ -306,90 +449,85 @@ async def get_search_count(
         cache_key = CacheManager.generate_cache_key("search_count", **cache_params)
         
         # Try cache first
-        cached_count = CacheManager.get(cache_key)
+        cached_count = await CacheManager.async_get(cache_key)
         if cached_count is not None:
             return {"total_count": cached_count}
     
-    query_obj = db.query(Property).filter(Property.is_available == True)
+    # Lambda statement like search_properties: construction is cached per filter shape
+    stmt = lambda_stmt(lambda: select(func.count()).select_from(Property).where(Property.is_available == True))
     
     # Apply same filters as search_properties
     if query:
-        search_filter = or_(
-            Property.title.ilike(f"%{query}%"),
-            Property.description.ilike(f"%{query}%"),
-            Property.address.ilike(f"%{query}%"),
-            Property.city.ilike(f"%{query}%"),
-            Property.state.ilike(f"%{query}%")
-        )
-        query_obj = query_obj.filter(search_filter)
+        tsquery = build_search_tsquery(query)
+        if tsquery is not None:
+            stmt += lambda s: s.where(Property.search_vector.op("@@")(func.to_tsquery("simple", tsquery)))
     
     if city:
-        query_obj = query_obj.filter(Property.city.ilike(f"%{city}%"))
+        city_pattern = f"%{city}%"
+        stmt += lambda s: s.where(Property.city.ilike(city_pattern))
     if state:
-        query_obj = query_obj.filter(and_(Property.state.is_not(None), Property.state == state))
+        stmt += lambda s: s.where(Property.state == state)
     if urban_area:
-        query_obj = query_obj.filter(and_(Property.urban_area.is_not(None), Property.urban_area == urban_area))
+        stmt += lambda s: s.where(Property.urban_area == urban_area)
     if district:
-        query_obj = query_obj.filter(and_(Property.district.is_not(None), Property.district == district))
+        stmt += lambda s: s.where(Property.district == district)
     if property_type:
-        query_obj = query_obj.filter(Property.property_type == property_type)
+        stmt += lambda s: s.where(Property.property_type == property_type)
     if listing_type:
-        query_obj = query_obj.filter(Property.listing_type == listing_type)
+        stmt += lambda s: s.where(Property.listing_type == listing_type)
     if min_bedrooms is not None:
-        query_obj = query_obj.filter(Property.bedrooms >= min_bedrooms)
+        stmt += lambda s: s.where(Property.bedrooms >= min_bedrooms)
     if max_bedrooms is not None:
-        query_obj = query_obj.filter(Property.bedrooms <= max_bedrooms)
+        stmt += lambda s: s.where(Property.bedrooms <= max_bedrooms)
     if min_bathrooms is not None:
-        query_obj = query_obj.filter(Property.bathrooms >= min_bathrooms)
+        stmt += lambda s: s.where(Property.bathrooms >= min_bathrooms)
     if max_bathrooms is not None:
-        query_obj = query_obj.filter(Property.bathrooms <= max_bathrooms)
+        stmt += lambda s: s.where(Property.bathrooms <= max_bathrooms)
     
     # Price filters - handle currency selection
     if min_rent is not None or max_rent is not None:
         if currency and currency.upper() == "USD":
-            # Filter by USD amount
+            # Filter by USD amount, falling back to the GEL amount where no USD price is stored
             if min_rent is not None:
-                query_obj = query_obj.filter(
-                    or_(
-                        Property.rent_amount_usd >= min_rent,
-                        and_(Property.rent_amount_usd.is_(None), Property.rent_amount >= min_rent * 2.7)
-                    )
-                )
+                min_rent_gel = min_rent * 2.7
+                stmt += lambda s: s.where(or_(
+                    Property.rent_amount_usd >= min_rent,
+                    and_(Property.rent_amount_usd.is_(None), Property.rent_amount >= min_rent_gel)
+                ))
             if max_rent is not None:
-                query_obj = query_obj.filter(
-                    or_(
-                        Property.rent_amount_usd <= max_rent,
-                        and_(Property.rent_amount_usd.is_(None), Property.rent_amount <= max_rent * 2.7)
-                    )
-                )
+                max_rent_gel = max_rent * 2.7
+                stmt += lambda s: s.where(or_(
+                    Property.rent_amount_usd <= max_rent,
+                    and_(Property.rent_amount_usd.is_(None), Property.rent_amount <= max_rent_gel)
+                ))
         else:
             # Filter by GEL amount (default)
             if min_rent is not None:
-                query_obj = query_obj.filter(Property.rent_amount >= min_rent)
+                stmt += lambda s: s.where(Property.rent_amount >= min_rent)
             if max_rent is not None:
-                query_obj = query_obj.filter(Property.rent_amount <= max_rent)
+                stmt += lambda s: s.where(Property.rent_amount <= max_rent)
     if min_square_feet is not None:
-        query_obj = query_obj.filter(Property.square_feet >= min_square_feet)
+        stmt += lambda s: s.where(Property.square_feet >= min_square_feet)
     if max_square_feet is not None:
-        query_obj = query_obj.filter(Property.square_feet <= max_square_feet)
+        stmt += lambda s: s.where(Property.square_feet <= max_square_feet)
     if pets_allowed is not None:
-        query_obj = query_obj.filter(Property.pets_allowed == pets_allowed)
+        stmt += lambda s: s.where(Property.pets_allowed == pets_allowed)
     if is_furnished is not None:
-        query_obj = query_obj.filter(Property.is_furnished == is_furnished)
+        stmt += lambda s: s.where(Property.is_furnished == is_furnished)
     if smoking_allowed is not None:
-        query_obj = query_obj.filter(Property.smoking_allowed == smoking_allowed)
+        stmt += lambda s: s.where(Property.smoking_allowed == smoking_allowed)
     if year_built_min is not None:
-        query_obj = query_obj.filter(Property.year_built >= year_built_min)
+        stmt += lambda s: s.where(Property.year_built >= year_built_min)
     if year_built_max is not None:
-        query_obj = query_obj.filter(Property.year_built <= year_built_max)
+        stmt += lambda s: s.where(Property.year_built <= year_built_max)
     if parking_spaces_min is not None:
-        query_obj = query_obj.filter(Property.parking_spaces >= parking_spaces_min)
+        stmt += lambda s: s.where(Property.parking_spaces >= parking_spaces_min)
     
-    total_count = query_obj.count()
+    total_count = await db.scalar(stmt)
     
     # Cache the result if available
     if CACHE_AVAILABLE:
-        CacheManager.set(cache_key, total_count, CACHE_TTL['property_count'])
+        await CacheManager.async_set(cache_key, total_count, CACHE_TTL['property_count'])
     
     return {"total_count": total_count}
 
@@ -404,7 +542,7 @@ async def get_saved_properties(
         Property.id == saved_properties.c.property_id
     ).filter(
         saved_properties.c.user_id == current_user.id
-    ).options(joinedload(Property.images)).all()
+    ).order_by(saved_properties.c.saved_at.desc()).options(PROPERTY_IMAGE_OPTIONS, raiseload("*")).all()
     
     return [
         PropertyListResponse(
@@ -434,18 +572,17 @@ async def get_saved_properties(
     ]
 
 @router.get("/{property_id}", response_model=PropertyResponse)
-async def get_property(property_id: int, db: Session = Depends(get_db)):
+async def get_property(property_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific property by ID"""
-    property_obj = db.query(Property).options(
-        joinedload(Property.images),
-        joinedload(Property.amenities)
-    ).filter(Property.id == property_id).first()
+    property_obj = (await db.scalars(
+        select(Property).options(*PROPERTY_RESPONSE_OPTIONS).filter(Property.id == property_id)
+    )).first()
     if not property_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Property not found"
         )
-    return PropertyResponse.model_validate(property_obj)
+    return (await db.run_sync(serialize_properties, [property_obj], PropertyResponse))[0]
 
 @router.post("/", response_model=PropertyResponse, status_code=status.HTTP_201_CREATED)
 async def create_property(
@@ -458,19 +595,16 @@ async def create_property(
     property_dict = property_data.dict(exclude={"amenity_ids"})
     db_property = Property(**property_dict, owner_id=current_user.id)
     
+    # Add amenities if provided (one IN query; unknown ids are skipped), saved with the property
+    if property_data.amenity_ids:
+        db_property.amenities = db.scalars(
+            select(Amenity).where(Amenity.id.in_(property_data.amenity_ids))
+        ).all()
+    
     db.add(db_property)
     db.commit()
     db.refresh(db_property)
     
-    # Add amenities if provided
-    if property_data.amenity_ids:
-        for amenity_id in property_data.amenity_ids:
-            amenity = db.query(Amenity).filter(Amenity.id == amenity_id).first()
-            if amenity:
-                db_property.amenities.append(amenity)
-        db.commit()
-        db.refresh(db_property)
-    
     return PropertyResponse.model_validate(db_property)
 
 @router.put("/{property_id}", response_model=PropertyResponse)
@@ -502,11 +636,10 @@ async def update_property(
     
     # Update amenities if provided
     if property_update.amenity_ids is not None:
-        property_obj.amenities.clear()
-        for amenity_id in property_update.amenity_ids:
-            amenity = db.query(Amenity).filter(Amenity.id == amenity_id).first()
-            if amenity:
-                property_obj.amenities.append(amenity)
+        # One IN query; unknown ids are skipped
+        property_obj.amenities = db.scalars(
+            select(Amenity).where(Amenity.id.in_(property_update.amenity_ids))
+        ).all()
     
     db.commit()
     db.refresh(property_obj)
@@ -543,21 +676,24 @@ async def delete_property(
 async def get_my_properties(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    after_created_at: Optional[datetime] = Query(None, description="Keyset: created_at of the last property seen"),
+    after_id: Optional[int] = Query(None, description="Keyset: id of the last property seen"),
     current_user: User = Depends(require_landlord),
     db: Session = Depends(get_db)
 ):
-    """Get current user's properties"""
-    properties = db.query(Property).options(joinedload(Property.images)).filter(
+    """Get current user's properties, newest first"""
+    query = db.query(Property).options(*PROPERTY_RESPONSE_OPTIONS).filter(
         Property.owner_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    )
+    properties = paginate_by_created(query, True, skip, limit, after_created_at, after_id).all()
     
-    return [PropertyListResponse.model_validate(prop) for prop in properties]
+    return serialize_properties(db, properties)
 
 @router.get("/amenities/", response_model=List[AmenityResponse])
-async def get_amenities(db: Session = Depends(get_db)):
+async def get_amenities(db: AsyncSession = Depends(get_async_db)):
     """Get all available amenities"""
-    amenities = db.query(Amenity).all()
-    return [AmenityResponse.model_validate(amenity) for amenity in amenities]
+    amenity_map = await db.run_sync(get_amenity_map)
+    return list(amenity_map.values())
 
 # Property Image endpoints
 @router.post("/{property_id}/images", response_model=PropertyImageResponse, status_code=status.HTTP_201_CREATED)
@@ -590,8 +726,11 @@ async def add_property_image(
         ).update({"is_primary": False})
     
     # Create image
-    db_image = PropertyImage(**image_data.dict(), property_id=property_id)
+    image_dict = image_data.dict()
+    host_id, path = split_image_url(db, image_dict.pop("image_url"))
+    db_image = PropertyImage(**image_dict, host_id=host_id, path=path, property_id=property_id)
     db.add(db_image)
+    sync_primary_image_url(db, property_obj)
     db.commit()
     db.refresh(db_image)
     
@@ -658,6 +797,7 @@ async def update_property_image(
     update_data = image_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(image_obj, field, value)
+    sync_primary_image_url(db, property_obj)
     
     db.commit()
     db.refresh(image_obj)
@@ -697,6 +837,7 @@ async def delete_property_image(
         )
     
     db.delete(image_obj)
+    sync_primary_image_url(db, property_obj)
     db.commit()
     
     return {"message": "Image deleted successfully"}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Any, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -231,6 +231,7 @@ class PropertyListResponse(BaseModel):
     longitude: Optional[float] = None
     floor_number: Optional[int] = None
     total_floors: Optional[int] = None
+    primary_image_url: Optional[str] = None
     external_id: Optional[str] = None
     source: Optional[str] = None
     user_type: Optional[str] = None
@@ -254,8 +255,8 @@ class RentalApplicationBase(BaseModel):
     employment_status: str = Field(..., min_length=1, max_length=100)
     employer_name: Optional[str] = Field(None, max_length=255)
     employer_contact: Optional[str] = Field(None, max_length=500)
-    references: Optional[str] = None  # JSON string
-    pets: Optional[str] = None  # JSON string
+    references: Optional[Any] = None  # JSON (stored as JSONB)
+    pets: Optional[Any] = None  # JSON (stored as JSONB)
     additional_notes: Optional[str] = None
 
 class RentalApplicationCreate(RentalApplicationBase):
@@ -269,8 +270,8 @@ class RentalApplicationUpdate(BaseModel):
     employment_status: Optional[str] = Field(None, min_length=1, max_length=100)
     employer_name: Optional[str] = Field(None, max_length=255)
     employer_contact: Optional[str] = Field(None, max_length=500)
-    references: Optional[str] = None
-    pets: Optional[str] = None
+    references: Optional[Any] = None
+    pets: Optional[Any] = None
     additional_notes: Optional[str] = None
 
 class RentalApplicationResponse(RentalApplicationBase):
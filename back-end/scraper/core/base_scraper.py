@@ -11,7 +11,9 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 
 import requests
+from requests.adapters import HTTPAdapter
 from sqlalchemy.orm import Session
+from urllib3.util.retry import Retry
 
 from .config import ScrapingConfig
 
@@ -25,6 +27,21 @@ except ImportError:
         from ..models.statistics import ScrapingStats
 
 
+def create_http_session(config: ScrapingConfig) -> requests.Session:
+    """requests session with pooled keep-alive connections and connection-level retries"""
+    session = requests.Session()
+    # Keep enough pooled keep-alive connections per host that TLS handshakes are amortized,
+    # and retry throttling / gateway errors with backoff at the connection level
+    adapter = HTTPAdapter(
+        pool_connections=config.http_pool_size,
+        pool_maxsize=config.http_pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 502, 503, 504))
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
 class BaseScraper(ABC):
     """Abstract base class for all scrapers."""
     
@@ -32,7 +49,7 @@ class BaseScraper(ABC):
         """Initialize the scraper with configuration."""
         self.config = config
         self.stats = ScrapingStats(start_time=datetime.now())
-        self.session = requests.Session()
+        self.session = create_http_session(config)
         self.request_times = []
         
         # Validate configuration
@@ -91,6 +108,7 @@ class BaseScraper(ABC):
         self.session.headers.update({
             'accept': 'application/json, text/plain, */*',
             'accept-language': 'ka-GE,ka;q=0.9,en;q=0.8,ru;q=0.7',
+            'connection': 'keep-alive',
             'global-authorization': '',
             'locale': 'ka',
             'origin': 'https://www.myhome.ge',
@@ -157,7 +175,7 @@ class BaseScraper(ABC):
                     url=url,
                     params=params,
                     headers=request_headers,
-                    timeout=self.config.timeout
+                    timeout=(self.config.connect_timeout, self.config.timeout)
                 )
                 
                 # Check for success
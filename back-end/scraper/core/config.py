@@ -19,12 +19,19 @@ class ScrapingConfig:
     batch_size: int = 1000  # Process full API pages
     delay_between_requests: float = 0.0  # No delays
     max_retries: int = 3
-    timeout: int = 30
+    timeout: int = 30  # Read timeout
+    connect_timeout: int = 5
+    http_pool_size: int = 32  # Pooled keep-alive connections per host
+    keepalive_timeout: int = 30  # Seconds an idle keep-alive connection is kept open
+    dns_cache_ttl: int = 300  # Seconds a resolved host address is reused
+    concurrent_pages: int = 8  # Listing pages fetched in parallel
     
     # Essential features only
     enable_deduplication: bool = True
     enable_owner_priority: bool = True
+    enable_address_dedup: bool = False  # Fuzzy address matching scans every listing's address
     enable_image_download: bool = False  # Speed optimization
+    full_refresh: bool = False  # Initial backfill: COPY new listings instead of multi-row INSERTs
     
     # Storage paths
     log_directory: str = "/app/logs"
@@ -104,11 +111,17 @@ class ScrapingConfig:
             'SCRAPER_DELAY': ('delay_between_requests', float),
             'SCRAPER_MAX_RETRIES': ('max_retries', int),
             'SCRAPER_TIMEOUT': ('timeout', int),
+            'SCRAPER_CONNECT_TIMEOUT': ('connect_timeout', int),
+            'SCRAPER_KEEPALIVE_TIMEOUT': ('keepalive_timeout', int),
+            'SCRAPER_DNS_CACHE_TTL': ('dns_cache_ttl', int),
+            'SCRAPER_CONCURRENT_PAGES': ('concurrent_pages', int),
             'SCRAPER_CLEANUP_DAYS': ('cleanup_days', int),
             'SCRAPER_CONCURRENT_LANGUAGES': ('concurrent_languages', lambda x: x.lower() == 'true'),
             'SCRAPER_ENABLE_IMAGES': ('enable_image_download', lambda x: x.lower() == 'true'),
             'SCRAPER_ENABLE_DEDUP': ('enable_deduplication', lambda x: x.lower() == 'true'),
             'SCRAPER_OWNER_PRIORITY': ('enable_owner_priority', lambda x: x.lower() == 'true'),
+            'SCRAPER_ADDRESS_DEDUP': ('enable_address_dedup', lambda x: x.lower() == 'true'),
+            'SCRAPER_FULL_REFRESH': ('full_refresh', lambda x: x.lower() == 'true'),
             'SCRAPER_RATE_LIMIT': ('rate_limit_per_minute', int),
             'SCRAPER_IMAGE_PATH': ('image_storage_path', str),
             'SCRAPER_LOG_DIR': ('log_directory', str),
@@ -146,6 +159,12 @@ class ScrapingConfig:
         if self.timeout <= 0:
             errors.append("timeout must be positive")
         
+        if self.connect_timeout <= 0:
+            errors.append("connect_timeout must be positive")
+        
+        if self.concurrent_pages < 1:
+            errors.append("concurrent_pages must be at least 1")
+        
         if self.cleanup_days < 0:
             errors.append("cleanup_days cannot be negative")
         
@@ -180,11 +199,17 @@ class ScrapingConfig:
             'delay_between_requests': self.delay_between_requests,
             'max_retries': self.max_retries,
             'timeout': self.timeout,
+            'connect_timeout': self.connect_timeout,
+            'keepalive_timeout': self.keepalive_timeout,
+            'dns_cache_ttl': self.dns_cache_ttl,
+            'concurrent_pages': self.concurrent_pages,
             'cleanup_days': self.cleanup_days,
             'concurrent_languages': self.concurrent_languages,
             'enable_image_download': self.enable_image_download,
             'enable_deduplication': self.enable_deduplication,
             'enable_owner_priority': self.enable_owner_priority,
+            'enable_address_dedup': self.enable_address_dedup,
+            'full_refresh': self.full_refresh,
             'rate_limit_per_minute': self.rate_limit_per_minute,
             'image_storage_path': self.image_storage_path,
             'log_directory': self.log_directory,
@@ -2,7 +2,7 @@
 Property data models for structured data handling.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
@@ -50,7 +50,7 @@ class PropertyParameter:
 class PropertyPrice:
     """Represents a property price in a specific currency."""
     
-    currency_type: str  # Currency ID from API
+    currency_type: int  # Currency ID from API
     price_total: float
     price_square: float = 0.0
     
@@ -159,7 +159,7 @@ class PropertyData:
         self.parameters.append(parameter)
         return parameter
     
-    def add_price(self, currency_type: str, price_total: float, **kwargs) -> PropertyPrice:
+    def add_price(self, currency_type: int, price_total: float, **kwargs) -> PropertyPrice:
         """Add a price to the property."""
         price = PropertyPrice(currency_type=currency_type, price_total=price_total, **kwargs)
         self.prices.append(price)
@@ -172,7 +172,7 @@ class PropertyData:
                 return image
         return self.images[0] if self.images else None
     
-    def get_price_by_currency(self, currency: str) -> Optional[PropertyPrice]:
+    def get_price_by_currency(self, currency: int) -> Optional[PropertyPrice]:
         """Get price in specific currency."""
         for price in self.prices:
             if price.currency_type == currency:
@@ -181,6 +181,7 @@ class PropertyData:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for database insertion."""
+        primary_image = self.get_primary_image()
         return {
             'external_id': self.external_id,
             'source': self.source,
@@ -220,5 +221,6 @@ class PropertyData:
             'total_floors': self.total_floors,
             'utilities_included': self.utilities_included,
             'user_type': self.user_type,
-            'last_scraped': self.last_scraped or datetime.now()
+            'primary_image_url': primary_image.url if primary_image else None,
+            'last_scraped': self.last_scraped or datetime.now(timezone.utc)
         }
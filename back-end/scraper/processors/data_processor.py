@@ -3,7 +3,9 @@ Base data processor for converting API responses to structured data.
 """
 
 import logging
+import re
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 
 # Import with fallbacks for Docker compatibility
@@ -18,6 +20,36 @@ except ImportError:
         from scraper.core.config import ScrapingConfig
         from scraper.models.property_data import PropertyData
 
+from database import CurrencyType
+
+
+# property_prices.currency_type references currencies, which holds exactly these ids
+_KNOWN_CURRENCY_TYPES = frozenset(currency.value for currency in CurrencyType)
+
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+@lru_cache(maxsize=4096)
+def _parse_number(text: str) -> Optional[float]:
+    """Parse an API string number such as '3', '10+' or '52.5'; None if it isn't one.
+    
+    Memoized: the API repeats the same small set of values ('1', '2', '10+', ...).
+    """
+    match = _NUMBER_RE.fullmatch(text.rstrip('+').strip())
+    return float(match.group()) if match else None
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """Numeric value of an API field, or None if it has none."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return _parse_number(value)
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
 
 class DataProcessor:
     """Handles property data processing and normalization."""
@@ -196,22 +228,17 @@ class DataProcessor:
         # Process each currency in the price data
         for currency_id, price_info in price_data.items():
             if isinstance(price_info, dict):
-                price_total = self._safe_float(price_info.get('price_total'), 0)
-                price_square = self._safe_float(price_info.get('price_square'), 0)
+                price_total = self._safe_float(price_info.get('price_total'))
+                price_square = self._safe_float(price_info.get('price_square'))
                 
+                currency_type = self._safe_int(currency_id)
+                if currency_type not in _KNOWN_CURRENCY_TYPES:
+                    # An unknown id would violate the currencies FK and fail the whole property
+                    self.logger.debug(f"Skipping price in unknown currency {currency_id!r}")
+                    continue
                 if price_total > 0:
-                    # Create PropertyPrice object using direct instantiation
-                    property_price = type('PropertyPrice', (), {
-                        'currency_type': str(currency_id),
-                        'price_total': float(price_total),
-                        'price_square': float(price_square) if price_square else 0.0,
-                        'to_dict': lambda self: {
-                            'currency_type': self.currency_type,
-                            'price_total': self.price_total,
-                            'price_square': self.price_square
-                        }
-                    })()
-                    property_data.prices.append(property_price)
+                    # Already floats; the numeric(12,2) columns round to cents on write
+                    property_data.add_price(currency_type, price_total, price_square=price_square)
     
     def _process_features(self, property_data: PropertyData, raw_data: Dict) -> None:
         """Process property features - SPEED OPTIMIZED."""
@@ -330,7 +357,13 @@ class DataProcessor:
             return None
             
         try:
-            for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y']:
+            # The API sends ISO dates; fromisoformat parses those without trying each format
+            return datetime.fromisoformat(date_str)
+        except (ValueError, TypeError):
+            pass
+        
+        try:
+            for fmt in ['%d/%m/%Y', '%m/%d/%Y']:
                 try:
                     return datetime.strptime(date_str, fmt)
                 except ValueError:
@@ -341,29 +374,13 @@ class DataProcessor:
     
     def _safe_int(self, value: Any, default: int = 0) -> int:
         """Safely convert value to int."""
-        if value is None:
-            return default
-        try:
-            if isinstance(value, str):
-                value = value.rstrip('+').strip()
-                if not value or not value.replace('.', '').replace('-', '').isdigit():
-                    return default
-            return int(float(value))
-        except (ValueError, TypeError):
-            return default
+        number = _to_number(value)
+        return default if number is None else int(number)
     
     def _safe_float(self, value: Any, default: float = 0.0) -> float:
         """Safely convert value to float."""
-        if value is None:
-            return default
-        try:
-            if isinstance(value, str):
-                value = value.rstrip('+').strip()
-                if not value or not value.replace('.', '').replace('-', '').isdigit():
-                    return default
-            return float(value)
-        except (ValueError, TypeError):
-            return default
+        number = _to_number(value)
+        return default if number is None else number
     
     def _extract_bathroom_count(self, raw_data: Dict) -> float:
         """Extract bathroom count - SPEED OPTIMIZED."""
@@ -413,22 +430,13 @@ class DataProcessor:
                     # Check if this is the main photo
                     is_main = image.get('is_main', False)
                     
-                    # Create PropertyImage object using direct instantiation
-                    property_image = type('PropertyImage', (), {
-                        'url': clean_url,
-                        'caption': None,
-                        'is_primary': is_main,
-                        'order_index': idx,
-                        'blur_url': image.get('blur', '').replace('\\/', '/') if image.get('blur') else None,
-                        'thumbnail_url': image.get('thumb', '').replace('\\/', '/') if image.get('thumb') else None,
-                        'to_dict': lambda self: {
-                            'image_url': self.url,
-                            'caption': self.caption,
-                            'is_primary': self.is_primary,
-                            'order_index': self.order_index
-                        }
-                    })()
-                    property_data.images.append(property_image)
+                    property_data.add_image(
+                        clean_url,
+                        is_primary=is_main,
+                        order_index=idx,
+                        blur_url=image.get('blur', '').replace('\\/', '/') if image.get('blur') else None,
+                        thumbnail_url=image.get('thumb', '').replace('\\/', '/') if image.get('thumb') else None
+                    )
     
     def _process_parameters(self, property_data: PropertyData, raw_data: Dict) -> None:
         """Process property parameters from API response."""
@@ -436,24 +444,19 @@ class DataProcessor:
         if not parameters or not isinstance(parameters, list):
             return
             
+        # The API sometimes repeats a parameter; keep one entry per id (the last one wins)
+        unique_parameters = {}
+        for param in parameters:
+            if isinstance(param, dict) and param.get('id'):
+                unique_parameters[param['id']] = param
+        
         # Store the full parameter data for later database parameter creation
-        property_data.raw_parameters = parameters
+        property_data.raw_parameters = list(unique_parameters.values())
         
         # Process each parameter from the API response
-        for param in parameters:
-            if isinstance(param, dict):
-                param_id = param.get('id')
-                if param_id:
-                    # Create PropertyParameter object for database storage
-                    # Use direct class instantiation instead of imports
-                    property_parameter = type('PropertyParameter', (), {
-                        'parameter_id': param_id,
-                        'parameter_value': param.get('parameter_value'),
-                        'parameter_select_name': param.get('parameter_select_name'),
-                        'to_dict': lambda self: {
-                            'parameter_id': self.parameter_id,
-                            'parameter_value': self.parameter_value,
-                            'parameter_select_name': self.parameter_select_name
-                        }
-                    })()
-                    property_data.parameters.append(property_parameter)
+        for param_id, param in unique_parameters.items():
+            property_data.add_parameter(
+                param_id,
+                parameter_value=param.get('parameter_value'),
+                parameter_select_name=param.get('parameter_select_name')
+            )
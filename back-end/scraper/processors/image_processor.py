@@ -4,20 +4,22 @@ Image processing for property images.
 
 import hashlib
 import logging
-import requests
 from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
 # Import with fallbacks for Docker compatibility
 try:
+    from core.base_scraper import create_http_session
     from core.config import ScrapingConfig
     from models.property_data import PropertyData, PropertyImage
 except ImportError:
     try:
+        from ..core.base_scraper import create_http_session
         from ..core.config import ScrapingConfig
         from ..models.property_data import PropertyData, PropertyImage
     except ImportError:
+        from scraper.core.base_scraper import create_http_session
         from scraper.core.config import ScrapingConfig
         from scraper.models.property_data import PropertyData, PropertyImage
 
@@ -31,6 +33,8 @@ class ImageProcessor:
         self.storage_path = Path(config.image_storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self.image_hashes = {}  # For duplicate detection
+        # One pooled session for every image request, so downloads reuse keep-alive connections
+        self.http = create_http_session(config)
         self.logger = logging.getLogger(self.__class__.__name__)
     
     def process_property_images(self, property_data: PropertyData, raw_data: Dict) -> None:
@@ -103,11 +107,12 @@ class ImageProcessor:
     def _calculate_image_hash(self, image_url: str) -> str:
         """Calculate MD5 hash for image content."""
         try:
-            response = requests.get(image_url, timeout=10, stream=True)
-            response.raise_for_status()
-            
-            # Read first 8KB for hash calculation (enough for duplicate detection)
-            content_chunk = response.raw.read(8192)
+            # Closing the streamed response hands its connection back to the pool
+            with self.http.get(image_url, timeout=(self.config.connect_timeout, 10), stream=True) as response:
+                response.raise_for_status()
+                
+                # Read first 8KB for hash calculation (enough for duplicate detection)
+                content_chunk = response.raw.read(8192)
             return hashlib.md5(content_chunk).hexdigest()
             
         except Exception as e:
@@ -133,14 +138,14 @@ class ImageProcessor:
                 return str(file_path)
             
             # Download image
-            response = requests.get(image_url, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            # Save image
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            with self.http.get(image_url, timeout=(self.config.connect_timeout, self.config.timeout), stream=True) as response:
+                response.raise_for_status()
+                
+                # Save image
+                with open(file_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        if chunk:
+                            f.write(chunk)
             
             return str(file_path)
             
@@ -4,6 +4,7 @@ Multilingual content processing.
 import logging
 import asyncio
 import aiohttp
+import orjson
 from typing import Dict, List, Optional
 
 # Import with fallbacks for Docker compatibility
@@ -114,7 +115,7 @@ class MultilingualProcessor:
             
             async with session.get(detail_url, headers=headers) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     
                     # The detail endpoint should return the property data directly
                     if data.get('result') and data.get('data'):
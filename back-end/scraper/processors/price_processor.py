@@ -57,7 +57,7 @@ class PriceProcessor:
                     
                     # Add price record to separate prices table
                     property_data.add_price(
-                        currency_type=currency_id,
+                        currency_type=currency_int,
                         price_total=price_total,
                         price_square=price_square
                     )
@@ -2,15 +2,18 @@
 Database service for property data persistence.
 """
 
+import io
 import logging
 import sys
 import os
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy import and_, or_, func, text
+from sqlalchemy import and_, or_, func, text, literal_column, insert, select, update, delete, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 # Add parent directories to path for Docker compatibility
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -35,7 +38,7 @@ except ImportError:
 
 from database import (
     Property, PropertyImage, PropertyParameter, PropertyPrice,
-    Parameter, User, SessionLocal
+    Parameter, User, SessionLocal, split_image_url
 )
 
 # Import with fallbacks for Docker compatibility
@@ -58,6 +61,8 @@ class DatabaseService:
         """Initialize the database service."""
         self.config = config
         self.logger = logging.getLogger(self.__class__.__name__)
+        # Parameter external_id -> internal id; parameters are never deleted so entries stay valid
+        self._parameter_ids: Dict[int, int] = {}
     
     def get_session(self) -> Session:
         """Get a database session with connection pooling."""
@@ -83,8 +88,8 @@ class DatabaseService:
                     is_verified=True
                 )
                 db.add(default_user)
+                # The INSERT's RETURNING already filled in the id; no refresh SELECT
                 db.commit()
-                db.refresh(default_user)
                 self.logger.info("Created default system user")
             
             return default_user
@@ -135,8 +140,8 @@ class DatabaseService:
             self.logger.info(f"💰 Saving {len(property_data.prices)} prices for property {property_id}")
             self._save_property_prices(db, property_obj.id, property_data.prices)
             
+            # expire_on_commit=False keeps the values we just wrote; no refresh SELECT needed
             db.commit()
-            db.refresh(property_obj)
             
             # Log final values after save
             self.logger.info(f"✅ Property {property_id} saved successfully! Final values:")
@@ -156,60 +161,283 @@ class DatabaseService:
             self.logger.error(f"❌ Error saving property {property_data.external_id}: {e}")
             raise RuntimeError(f"Failed to save property: {e}")
     
-    def _save_property_images(self, db: Session, property_id: int, images: List) -> None:
-        """Save property images."""
-        for idx, image in enumerate(images):
+    def _image_rows(self, db: Session, property_id: int, images: List) -> List[dict]:
+        """Column dicts for property_images rows (image_url split into host_id + path)."""
+        rows = []
+        for image in images:
             image_data = image.to_dict()
+            image_data['host_id'], image_data['path'] = split_image_url(db, image_data.pop('image_url'))
             image_data['property_id'] = property_id
-            
+            rows.append(image_data)
+        return rows
+    
+    def preload_parameters(self, db: Session) -> None:
+        """(Re)load the parameter id cache; call at startup and after a rollback."""
+        self._parameter_ids = dict(db.execute(select(Parameter.external_id, Parameter.id)).all())
+        self.logger.info(f"Loaded {len(self._parameter_ids)} parameters into cache")
+    
+    def _resolve_parameter_ids(self, db: Session, external_ids: List[int]) -> Dict[int, int]:
+        """Map parameter external_ids to internal ids, creating unknown parameters in one INSERT."""
+        missing = {external_id for external_id in external_ids if external_id not in self._parameter_ids}
+        if missing:
+            self.logger.info(f"Creating {len(missing)} new parameters: {sorted(missing)}")
+            # Create basic parameter records; rows another writer added meanwhile are left alone
+            db.execute(
+                pg_insert(Parameter).values([
+                    {
+                        'external_id': external_id,
+                        'key': f'param_{external_id}',
+                        'sort_index': external_id,
+                        'parameter_type': 'parameter',
+                        'display_name': f'Parameter {external_id}'
+                    }
+                    for external_id in missing
+                ]).on_conflict_do_nothing(index_elements=['external_id'])
+            )
+            self._parameter_ids.update(db.execute(
+                select(Parameter.external_id, Parameter.id).where(Parameter.external_id.in_(missing))
+            ).all())
+        return self._parameter_ids
+    
+    def _parameter_rows(self, db: Session, property_id: int, parameters: List) -> List[dict]:
+        """Column dicts for property_parameters rows, creating unknown parameters."""
+        # parameter_id holds the external_id from the API; map it to the internal database ID
+        parameter_ids = self._resolve_parameter_ids(db, [param.parameter_id for param in parameters])
+        # Keyed by parameter so (property_id, parameter_id) stays unique; the last value wins
+        rows = {}
+        for param in parameters:
+            parameter_id = parameter_ids[param.parameter_id]
+            rows[parameter_id] = {
+                'property_id': property_id,
+                'parameter_id': parameter_id,
+                'parameter_value': param.parameter_value,
+                'parameter_select_name': param.parameter_select_name
+            }
+        return list(rows.values())
+    
+    def _price_rows(self, property_id: int, prices: List) -> List[dict]:
+        """Column dicts for property_prices rows, one per currency."""
+        rows = {}
+        for price in prices:
+            price_data = price.to_dict()
+            price_data['property_id'] = property_id
+            rows[price_data['currency_type']] = price_data
+        return list(rows.values())
+    
+    def _save_property_images(self, db: Session, property_id: int, images: List) -> None:
+        """Save property images."""
+        for image_data in self._image_rows(db, property_id, images):
             # Use the database model class (DBPropertyImage, not PropertyImage)
-            property_image = DBPropertyImage(**image_data)
-            db.add(property_image)
+            db.add(DBPropertyImage(**image_data))
     
     def _save_property_parameters(self, db: Session, property_id: int, parameters: List) -> None:
         """Save property parameters."""
-        for param in parameters:
-            # Map external_id to internal parameter ID
-            parameter_external_id = param.parameter_id  # This contains the external_id from API
-            
-            # Find the parameter by external_id and get its internal id
-            existing_param = db.query(Parameter).filter(Parameter.external_id == parameter_external_id).first()
-            
-            if not existing_param:
-                self.logger.info(f"Creating new parameter with external_id: {parameter_external_id}")
-                # Create basic parameter record if it doesn't exist
-                existing_param = Parameter(
-                    external_id=parameter_external_id,
-                    key=f'param_{parameter_external_id}',
-                    sort_index=parameter_external_id,
-                    parameter_type='parameter',
-                    display_name=f'Parameter {parameter_external_id}'
-                )
-                db.add(existing_param)
-                db.flush()  # Get the ID
-            
-            # Create PropertyParameter with the correct internal parameter ID
-            property_param = PropertyParameter(
-                property_id=property_id,
-                parameter_id=existing_param.id,  # Use the internal database ID
-                parameter_value=param.parameter_value,
-                parameter_select_name=param.parameter_select_name
-            )
-            db.add(property_param)
+        for param_data in self._parameter_rows(db, property_id, parameters):
+            db.add(PropertyParameter(**param_data))
     
     def _save_property_prices(self, db: Session, property_id: int, prices: List) -> None:
         """Save property prices."""
-        for idx, price in enumerate(prices):
-            price_data = price.to_dict()
-            price_data['property_id'] = property_id
-            
+        for price_data in self._price_rows(property_id, prices):
             # Use the database model class (DBPropertyPrice, not PropertyPrice)
-            property_price = DBPropertyPrice(**price_data)
-            db.add(property_price)
+            db.add(DBPropertyPrice(**price_data))
+    
+    def _sync_property_children(self, db: Session, property_id: int, property_data: PropertyData) -> None:
+        """Bring an existing property's parameters, prices and images in line with property_data.
+        
+        Unchanged rows are left untouched: parameters and prices are upserted on
+        their unique keys (skipping no-op updates), images are diffed by URL, and
+        only rows that disappeared are deleted.
+        """
+        parameters = PropertyParameter.__table__
+        parameter_rows = self._parameter_rows(db, property_id, property_data.parameters)
+        if parameter_rows:
+            stmt = pg_insert(parameters).values(parameter_rows)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=['property_id', 'parameter_id'],
+                set_={
+                    'parameter_value': stmt.excluded.parameter_value,
+                    'parameter_select_name': stmt.excluded.parameter_select_name
+                },
+                where=or_(
+                    parameters.c.parameter_value.is_distinct_from(stmt.excluded.parameter_value),
+                    parameters.c.parameter_select_name.is_distinct_from(stmt.excluded.parameter_select_name)
+                )
+            ))
+        db.execute(delete(parameters).where(
+            parameters.c.property_id == property_id,
+            parameters.c.parameter_id.not_in([row['parameter_id'] for row in parameter_rows])
+        ))
+        
+        prices = PropertyPrice.__table__
+        price_rows = self._price_rows(property_id, property_data.prices)
+        if price_rows:
+            stmt = pg_insert(prices).values(price_rows)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=['property_id', 'currency_type'],
+                set_={
+                    'price_total': stmt.excluded.price_total,
+                    'price_square': stmt.excluded.price_square
+                },
+                where=or_(
+                    prices.c.price_total.is_distinct_from(stmt.excluded.price_total),
+                    prices.c.price_square.is_distinct_from(stmt.excluded.price_square)
+                )
+            ))
+        db.execute(delete(prices).where(
+            prices.c.property_id == property_id,
+            prices.c.currency_type.not_in([row['currency_type'] for row in price_rows])
+        ))
+        
+        # Images have no natural unique key (uploads share order_index 0), so diff by URL in Python
+        images = PropertyImage.__table__
+        new_images = {(row['host_id'], row['path']): row for row in self._image_rows(db, property_id, property_data.images)}
+        stale_ids = []
+        for image in db.execute(
+            select(images.c.id, images.c.host_id, images.c.path, images.c.caption,
+                   images.c.is_primary, images.c.order_index)
+            .where(images.c.property_id == property_id)
+        ):
+            row = new_images.pop((image.host_id, image.path), None)
+            if row is None:
+                stale_ids.append(image.id)
+            elif (image.caption, image.is_primary, image.order_index) != (row['caption'], row['is_primary'], row['order_index']):
+                db.execute(update(images).where(images.c.id == image.id).values(
+                    caption=row['caption'], is_primary=row['is_primary'], order_index=row['order_index']
+                ))
+        if stale_ids:
+            db.execute(delete(images).where(images.c.id.in_(stale_ids)))
+        if new_images:
+            db.execute(insert(images), list(new_images.values()))
+    
+    def bulk_insert_properties(self, db: Session, properties: List[PropertyData], default_user: User) -> int:
+        """Insert new properties and their related records with one multi-row INSERT per table.
+        
+        Properties must not exist yet; nothing is committed here. Returns the
+        number of properties inserted.
+        """
+        if not properties:
+            return 0
+        
+        property_rows = []
+        for property_data in properties:
+            property_dict = property_data.to_dict()
+            property_dict['owner_id'] = default_user.id
+            property_rows.append(property_dict)
+        
+        property_ids = {
+            str(external_id): property_id
+            for property_id, external_id in db.execute(
+                insert(Property).returning(Property.id, Property.external_id), property_rows
+            )
+        }
+        
+        # Create every parameter the batch is missing up front, in one statement
+        self._resolve_parameter_ids(
+            db, [param.parameter_id for property_data in properties for param in property_data.parameters]
+        )
+        
+        image_rows, parameter_rows, price_rows = [], [], []
+        for property_data in properties:
+            property_id = property_ids[str(property_data.external_id)]
+            image_rows.extend(self._image_rows(db, property_id, property_data.images))
+            parameter_rows.extend(self._parameter_rows(db, property_id, property_data.parameters))
+            price_rows.extend(self._price_rows(property_id, property_data.prices))
+        
+        if image_rows:
+            db.execute(insert(PropertyImage), image_rows)
+        if parameter_rows:
+            db.execute(insert(PropertyParameter), parameter_rows)
+        if price_rows:
+            db.execute(insert(PropertyPrice), price_rows)
+        
+        return len(property_ids)
+    
+    @staticmethod
+    def _copy_value(value) -> str:
+        """Render one value in COPY text format."""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+    
+    def _copy_rows(self, cursor, table: str, rows: List[dict]) -> None:
+        """Stream column dicts into a table with COPY FROM STDIN."""
+        if not rows:
+            return
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(self._copy_value(row[column]) for column in columns))
+            buffer.write('\n')
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    
+    def copy_insert_properties(self, db: Session, properties: List[PropertyData], default_user: User) -> int:
+        """Full-refresh fast path: load a batch with COPY instead of multi-row INSERTs.
+        
+        Properties are COPYed into a temp staging table and moved into
+        properties with INSERT ... SELECT, skipping listings that already
+        exist; related rows of the inserted properties are COPYed directly.
+        Needs the psycopg2 driver; nothing is committed here. Returns the
+        number of properties inserted.
+        """
+        if not properties:
+            return 0
+        
+        property_rows = []
+        for property_data in properties:
+            property_dict = property_data.to_dict()
+            property_dict['owner_id'] = default_user.id
+            property_rows.append(property_dict)
+        
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS property_stage "
+                "(LIKE properties INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            cursor.execute("TRUNCATE property_stage")
+            self._copy_rows(cursor, 'property_stage', property_rows)
+            
+            columns = ', '.join(property_rows[0])
+            property_ids = {
+                str(external_id): property_id
+                for property_id, external_id in db.execute(text(
+                    f"INSERT INTO properties ({columns}) SELECT {columns} FROM property_stage "
+                    "ON CONFLICT (source, external_id) DO NOTHING RETURNING id, external_id"
+                ))
+            }
+            
+            self._resolve_parameter_ids(
+                db, [param.parameter_id for property_data in properties for param in property_data.parameters]
+            )
+            
+            image_rows, parameter_rows, price_rows = [], [], []
+            for property_data in properties:
+                property_id = property_ids.get(str(property_data.external_id))
+                if property_id is None:
+                    continue
+                image_rows.extend(self._image_rows(db, property_id, property_data.images))
+                parameter_rows.extend(self._parameter_rows(db, property_id, property_data.parameters))
+                price_rows.extend(self._price_rows(property_id, property_data.prices))
+            
+            self._copy_rows(cursor, 'property_images', image_rows)
+            self._copy_rows(cursor, 'property_parameters', parameter_rows)
+            self._copy_rows(cursor, 'property_prices', price_rows)
+        finally:
+            cursor.close()
+        
+        return len(property_ids)
     
     def _ensure_parameter_exists(self, db: Session, param_data: dict) -> Parameter:
         """Ensure parameter exists in database with full API data."""
         external_id = param_data.get('id')
+        if external_id in self._parameter_ids:
+            return db.get(Parameter, self._parameter_ids[external_id])
         existing_param = db.query(Parameter).filter(Parameter.external_id == external_id).first()
         
         if not existing_param:
@@ -230,9 +458,11 @@ class DatabaseService:
             )
             db.add(parameter)
             db.flush()
+            self._parameter_ids[external_id] = parameter.id
             self.logger.info(f"Created parameter: {parameter.key} ({parameter.display_name})")
             return parameter
         
+        self._parameter_ids[external_id] = existing_param.id
         return existing_param
     
     def find_existing_property(self, db: Session, external_id: str) -> Optional[Property]:
@@ -242,6 +472,18 @@ class DatabaseService:
             Property.source == 'myhome.ge'
         ).first()
     
+    def find_existing_properties(self, db: Session, external_ids: List[str]) -> Dict[str, Property]:
+        """Find existing properties for a whole batch of external IDs in one query."""
+        if not external_ids:
+            return {}
+        return {
+            prop.external_id: prop
+            for prop in db.query(Property).filter(
+                Property.source == 'myhome.ge',
+                Property.external_id.in_(external_ids)
+            )
+        }
+    
     def update_property(self, db: Session, existing_property: Property, 
                        property_data: PropertyData) -> Property:
         """Update existing property with new data."""
@@ -252,26 +494,14 @@ class DatabaseService:
                 if hasattr(existing_property, key):
                     setattr(existing_property, key, value)
             
-            # Update timestamp
-            existing_property.updated_at = datetime.now()
-            existing_property.last_scraped = datetime.now()
+            # last_scraped comes from to_dict(); updated_at is set by the database trigger
             
-            # Remove old related records manually to avoid foreign key issues
-            try:
-                db.query(PropertyImage).filter(PropertyImage.property_id == existing_property.id).delete()
-                db.query(PropertyParameter).filter(PropertyParameter.property_id == existing_property.id).delete()
-                db.query(PropertyPrice).filter(PropertyPrice.property_id == existing_property.id).delete()
-                db.flush()  # Flush deletions
-            except Exception as e:
-                self.logger.warning(f"Error deleting old related records for property {property_data.external_id}: {e}")
-            
-            # Add new related records
-            self._save_property_images(db, existing_property.id, property_data.images)
-            self._save_property_parameters(db, existing_property.id, property_data.parameters)
-            self._save_property_prices(db, existing_property.id, property_data.prices)
+            # Write only the related records that changed
+            db.flush()
+            self._sync_property_children(db, existing_property.id, property_data)
             
+            # updated_at (trigger-set) stays expired and loads only if someone reads it
             db.commit()
-            db.refresh(existing_property)
             
             self.logger.debug(f"Successfully updated property {property_data.external_id}")
             return existing_property
@@ -281,41 +511,54 @@ class DatabaseService:
             self.logger.error(f"Error updating property {property_data.external_id}: {e}")
             raise RuntimeError(f"Failed to update property: {e}")
     
+    def upsert_property(self, db: Session, property_data: PropertyData, default_user: User) -> Tuple[int, bool]:
+        """Insert or update a property by (source, external_id) in one statement.
+        
+        Returns the property id and whether the row was newly inserted. Related
+        records of an updated property are synced, writing only what changed.
+        """
+        property_dict = property_data.to_dict()
+        property_dict['owner_id'] = default_user.id
+        
+        stmt = pg_insert(Property).values(**property_dict)
+        update_columns = {
+            key: stmt.excluded[key] for key in property_dict
+            if key not in ('source', 'external_id', 'owner_id')
+        }
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['source', 'external_id'],
+            set_=update_columns
+        ).returning(Property.id, literal_column('(xmax = 0)').label('inserted'))
+        
+        property_id, inserted = db.execute(stmt).one()
+        
+        if inserted:
+            self._save_property_images(db, property_id, property_data.images)
+            self._save_property_parameters(db, property_id, property_data.parameters)
+            self._save_property_prices(db, property_id, property_data.prices)
+        else:
+            self._sync_property_children(db, property_id, property_data)
+        
+        return property_id, inserted
+    
     def cleanup_old_properties(self, db: Session) -> int:
         """Remove properties that haven't been scraped recently."""
         try:
-            cutoff_date = datetime.now() - timedelta(days=self.config.cleanup_days)
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.config.cleanup_days)
             
-            old_properties = db.query(Property).filter(
-                and_(
-                    Property.source == 'myhome.ge',
-                    or_(
-                        Property.last_scraped < cutoff_date,
-                        Property.last_scraped.is_(None)
-                    )
-                )
-            ).all()
+            # One DELETE; images, parameters, prices, amenity links and saves go with it via
+            # ON DELETE CASCADE. Properties with rental applications are kept.
+            count = db.query(Property).filter(
+                Property.source == 'myhome.ge',
+                or_(
+                    Property.last_scraped < cutoff_date,
+                    Property.last_scraped.is_(None)
+                ),
+                ~Property.applications.any()
+            ).delete(synchronize_session=False)
+            db.commit()
             
-            count = len(old_properties)
             if count > 0:
-                # Delete properties one by one to ensure cascading works properly
-                for prop in old_properties:
-                    try:
-                        # Manually delete related records first if cascade doesn't work
-                        db.query(PropertyImage).filter(PropertyImage.property_id == prop.id).delete()
-                        db.query(PropertyParameter).filter(PropertyParameter.property_id == prop.id).delete()
-                        db.query(PropertyPrice).filter(PropertyPrice.property_id == prop.id).delete()
-                        
-                        # Now delete the property
-                        db.delete(prop)
-                        db.flush()  # Flush each delete to catch issues early
-                        
-                    except Exception as e:
-                        self.logger.warning(f"Error deleting property {prop.id}: {e}")
-                        db.rollback()
-                        continue
-                
-                db.commit()
                 self.logger.info(f"Cleaned up {count} old properties")
             
             return count
@@ -325,6 +568,27 @@ class DatabaseService:
             self.logger.error(f"Error cleaning up old properties: {e}")
             return 0
     
+    def touch_properties(self, db: Session, external_ids: List[str]) -> int:
+        """Stamp last_scraped on listings seen on an unchanged page, so cleanup keeps them."""
+        if not external_ids:
+            return 0
+        try:
+            # One array parameter instead of one bind per id
+            result = db.execute(
+                update(Property)
+                .where(
+                    Property.source == 'myhome.ge',
+                    Property.external_id == any_(bindparam('external_ids', type_=ARRAY(Property.external_id.type)))
+                )
+                .values(last_scraped=datetime.now(timezone.utc)),
+                {'external_ids': external_ids}
+            )
+            db.commit()
+            return result.rowcount
+        except Exception:
+            db.rollback()
+            raise
+    
     def get_active_property_ids(self, db: Session) -> List[str]:
         """Get list of active property external IDs."""
         try:
@@ -3,13 +3,15 @@ Deduplication service for identifying and handling duplicate properties.
 """
 
 import logging
+import math
 import re
 import sys
 import os
+from collections import defaultdict
 from difflib import SequenceMatcher
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_
 
 # Add parent directories to path for Docker compatibility
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -37,22 +39,78 @@ except ImportError:
 class DeduplicationService:
     """Service for handling property deduplication."""
     
+    # Coordinates closer than this (approximately 10 meters) count as the same place
+    COORDINATE_TOLERANCE = 0.0001
+    
     def __init__(self, config: ScrapingConfig):
         """Initialize the deduplication service."""
         self.config = config
         self.enable_owner_priority = config.enable_owner_priority
+        self.enable_address_dedup = config.enable_address_dedup
         self.similarity_threshold = 0.85
         self.logger = logging.getLogger(self.__class__.__name__)
     
-    def find_duplicates(self, db: Session, property_data: PropertyData) -> List[Property]:
-        """Find potential duplicate properties in the database."""
+    def prefetch_candidates(self, db: Session, properties: List[PropertyData]) -> Dict:
+        """Load every possible duplicate for a batch up front so find_duplicates needs no queries.
+        
+        Returns exact matches keyed by external_id, coordinate matches bucketed
+        by grid cell, and (id, normalized address) pairs for the similarity check.
+        """
+        external_ids = [str(prop.external_id) for prop in properties]
+        by_external_id = {
+            prop.external_id: prop
+            for prop in db.query(Property).filter(
+                Property.source == 'myhome.ge',
+                Property.external_id.in_(external_ids)
+            )
+        }
+        
+        # One bounding-box query covering the whole batch, bucketed for O(1) lookups
+        by_cell = defaultdict(list)
+        coordinates = [(prop.latitude, prop.longitude) for prop in properties if prop.latitude and prop.longitude]
+        if coordinates:
+            lats, lngs = zip(*coordinates)
+            tolerance = self.COORDINATE_TOLERANCE
+            for prop in db.query(Property).filter(
+                Property.source == 'myhome.ge',
+                Property.latitude.between(min(lats) - tolerance, max(lats) + tolerance),
+                Property.longitude.between(min(lngs) - tolerance, max(lngs) + tolerance)
+            ):
+                by_cell[self._coordinate_cell(prop.latitude, prop.longitude)].append(prop)
+        
+        addresses = []
+        if self.enable_address_dedup:
+            addresses = [
+                (prop_id, self._normalize_address(address))
+                for prop_id, address in db.query(Property.id, Property.address).filter(
+                    Property.source == 'myhome.ge',
+                    Property.address.isnot(None)
+                )
+            ]
+        
+        return {'by_external_id': by_external_id, 'by_cell': by_cell, 'addresses': addresses}
+    
+    def _coordinate_cell(self, lat: float, lng: float) -> tuple:
+        """Grid cell of COORDINATE_TOLERANCE size containing (lat, lng)."""
+        return (math.floor(lat / self.COORDINATE_TOLERANCE), math.floor(lng / self.COORDINATE_TOLERANCE))
+    
+    def find_duplicates(self, db: Session, property_data: PropertyData,
+                        candidates: Optional[Dict] = None) -> List[Property]:
+        """Find potential duplicate properties in the database.
+        
+        Pass the result of prefetch_candidates to match against the preloaded
+        batch instead of querying per property.
+        """
         property_id = property_data.external_id
         self.logger.info(f"🔍 Checking for duplicates of property {property_id}")
         duplicates = []
         
         try:
             # Primary check: exact external_id match
-            exact_match = self._find_exact_match(db, property_data.external_id)
+            if candidates is not None:
+                exact_match = candidates['by_external_id'].get(str(property_data.external_id))
+            else:
+                exact_match = self._find_exact_match(db, property_data.external_id)
             if exact_match:
                 self.logger.info(f"🎯 Found EXACT MATCH for property {property_id}: DB ID {exact_match.id}")
                 duplicates.append(exact_match)
@@ -62,16 +120,26 @@ class DeduplicationService:
             
             # Secondary check: coordinate-based matching
             if property_data.latitude and property_data.longitude:
-                coordinate_matches = self._find_coordinate_matches(
-                    db, property_data.latitude, property_data.longitude
-                )
+                if candidates is not None:
+                    coordinate_matches = self._match_cached_coordinates(
+                        candidates['by_cell'], property_data.latitude, property_data.longitude
+                    )
+                else:
+                    coordinate_matches = self._find_coordinate_matches(
+                        db, property_data.latitude, property_data.longitude
+                    )
                 if coordinate_matches:
                     self.logger.info(f"📍 Found {len(coordinate_matches)} coordinate matches for property {property_id}")
                 duplicates.extend(coordinate_matches)
             
-            # Tertiary check: address similarity
-            if property_data.address:
-                address_matches = self._find_address_matches(db, property_data.address, duplicates)
+            # Tertiary check: address similarity (opt-in, it compares against every listing)
+            if self.enable_address_dedup and property_data.address:
+                if candidates is not None:
+                    address_matches = self._match_cached_addresses(
+                        db, candidates['addresses'], property_data.address, duplicates
+                    )
+                else:
+                    address_matches = self._find_address_matches(db, property_data.address, duplicates)
                 if address_matches:
                     self.logger.info(f"🏠 Found {len(address_matches)} address matches for property {property_id}")
                 duplicates.extend(address_matches)
@@ -102,16 +170,43 @@ class DeduplicationService:
         
         return result
     
+    def _match_cached_coordinates(self, by_cell: Dict, lat: float, lng: float) -> List[Property]:
+        """Coordinate matches from prefetched grid cells (the cell and its neighbours)."""
+        cell_lat, cell_lng = self._coordinate_cell(lat, lng)
+        return [
+            prop
+            for d_lat in (-1, 0, 1)
+            for d_lng in (-1, 0, 1)
+            for prop in by_cell.get((cell_lat + d_lat, cell_lng + d_lng), ())
+            if abs(prop.latitude - lat) < self.COORDINATE_TOLERANCE
+            and abs(prop.longitude - lng) < self.COORDINATE_TOLERANCE
+        ]
+    
+    def _match_cached_addresses(self, db: Session, addresses: List[tuple], address: str,
+                                exclude_properties: List[Property]) -> List[Property]:
+        """Address matches from prefetched normalized addresses; loads only the matching rows."""
+        exclude_ids = {prop.id for prop in exclude_properties}
+        normalized = self._normalize_address(address)
+        match_ids = [
+            prop_id for prop_id, other in addresses
+            if prop_id not in exclude_ids
+            and SequenceMatcher(None, normalized, other).ratio() >= self.similarity_threshold
+        ]
+        if not match_ids:
+            return []
+        return db.query(Property).filter(Property.id.in_(match_ids)).all()
+    
     def _find_coordinate_matches(self, db: Session, lat: float, lng: float) -> List[Property]:
         """Find properties with very similar coordinates."""
-        coordinate_tolerance = 0.0001  # Approximately 10 meters
+        coordinate_tolerance = self.COORDINATE_TOLERANCE
         
+        # Range bounds rather than abs() so the (latitude, longitude) index can be used
         return db.query(Property).filter(
             and_(
-                Property.latitude.isnot(None),
-                Property.longitude.isnot(None),
-                func.abs(Property.latitude - lat) < coordinate_tolerance,
-                func.abs(Property.longitude - lng) < coordinate_tolerance,
+                Property.latitude > lat - coordinate_tolerance,
+                Property.latitude < lat + coordinate_tolerance,
+                Property.longitude > lng - coordinate_tolerance,
+                Property.longitude < lng + coordinate_tolerance,
                 Property.source == 'myhome.ge'
             )
         ).all()
@@ -16,6 +16,9 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Resolved once; checked on every request by SecurityMiddleware
+IS_PROD = settings.is_production()
+
 # Initialize Redis client for rate limiting and caching
 if settings.rate_limit_enabled:
     try:
@@ -82,7 +85,7 @@ class SecurityMiddleware:
     
     async def _check_security_headers(self, request: Request) -> bool:
         """Check for required security headers in production, but allow HTTP from localhost and Docker network"""
-        if not settings.is_production():
+        if not IS_PROD:
             return True
 
         # Allow HTTP from trusted internal sources
@@ -0,0 +1,62 @@
+"""Serializing properties through the router's loader options"""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, raiseload
+
+from database import Base, ImageHost, Property, PropertyImage, User
+from routers.properties import PROPERTY_IMAGE_OPTIONS, PROPERTY_RESPONSE_OPTIONS, serialize_properties
+from schemas import PropertyListResponse, PropertyResponse
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    # The models use PostgreSQL-only types; loader behaviour doesn't depend on column types,
+    # so an in-memory SQLite database with untyped columns is enough
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            columns = ", ".join(f'"{column.name}"' for column in table.columns)
+            conn.exec_driver_sql(f'CREATE TABLE "{table.name}" ({columns})')
+        conn.execute(insert(User.__table__).values(
+            id=1, email="owner@example.com", password_hash="x", first_name="A", last_name="B",
+            role="landlord", is_active=True, is_verified=True, created_at=NOW
+        ))
+        conn.execute(insert(Property.__table__).values(
+            id=1, title="Flat", address="1 Main St", city="Tbilisi", country="Georgia",
+            property_type="apartment", listing_type="rent", bedrooms=2, bathrooms=1.0,
+            rent_amount=1000.0, lease_duration=12, is_available=True, is_furnished=False,
+            pets_allowed=False, smoking_allowed=False, parking_spaces=0, owner_id=1, created_at=NOW
+        ))
+        conn.execute(insert(ImageHost.__table__).values(id=1, prefix="https://img.example.com/"))
+        conn.execute(insert(PropertyImage.__table__), [
+            {"id": 1, "property_id": 1, "host_id": 1, "path": "a.jpg",
+             "is_primary": True, "order_index": 0, "created_at": NOW},
+            {"id": 2, "property_id": 1, "host_id": None, "path": "/uploads/b.jpg",
+             "is_primary": False, "order_index": 1, "created_at": NOW},
+        ])
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+EXPECTED_URLS = ["/uploads/b.jpg", "https://img.example.com/a.jpg"]
+
+
+@pytest.mark.parametrize("schema", [PropertyResponse, PropertyListResponse])
+def test_serialize_with_response_options(db, schema):
+    properties = db.scalars(select(Property).options(*PROPERTY_RESPONSE_OPTIONS)).all()
+    
+    [serialized] = serialize_properties(db, properties, schema)
+    
+    assert sorted(image.image_url for image in serialized.images) == EXPECTED_URLS
+
+
+def test_saved_properties_options_load_image_hosts(db):
+    # get_saved_properties builds its responses from the images directly
+    [prop] = db.scalars(select(Property).options(PROPERTY_IMAGE_OPTIONS, raiseload("*"))).all()
+    
+    assert sorted(image.image_url for image in prop.images) == EXPECTED_URLS